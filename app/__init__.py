@@ -1,4 +1,3 @@
-import os
 from flask import Flask, render_template
 from config import Config
 from .extensions import db, login_manager, csrf
@@ -7,28 +6,55 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Pick pool settings for this deployment before the engine is created
+    from .services import db_pool
+    db_pool.init_app(app)
+
+    # Cookie sessions that keep Vary: Cookie off responses shared through CDNs
+    from .services import shared_cache
+    shared_cache.init_app(app)
+
     # Initialize Extensions
     db.init_app(app)
     login_manager.init_app(app)
     csrf.init_app(app)
 
-    # Ensure upload folder exists (use /tmp on serverless)
-    try:
-        if not os.path.exists(app.config['UPLOAD_FOLDER']):
-            os.makedirs(app.config['UPLOAD_FOLDER'])
-    except OSError:
-        app.config['UPLOAD_FOLDER'] = os.path.join('/tmp', 'uploads')
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    # Opt-in; registered first so its timings cover the other request hooks
+    from .services import profiler
+    profiler.init_app(app)
+
+    from .services import page_views, order_feed, kitchen_queue
+    page_views.init_app(app)
+    order_feed.init_app(app)
+    kitchen_queue.init_app(app)
+
+    # Intake limits for create_order (see services/order_intake.py)
+    from .services import order_intake
+    order_intake.init_app(app)
+
+    from .services import storage
+    storage.init_app(app)
+
+    # Template bytecode cache (see services/cold_start.py)
+    from .services import cold_start
+    cold_start.init_app(app)
 
     # Register Blueprints natively
     from .blueprints.public.routes import public_bp
     from .blueprints.admin.routes import admin_bp
     from .blueprints.auth.routes import auth_bp
-    
+
     app.register_blueprint(public_bp)
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(auth_bp, url_prefix='/auth')
 
+    from .services.image_service import image_sources
+    app.add_template_global(image_sources)
+
+    # Fingerprinted CSS/JS bundles and asset_url() (see build_assets.py)
+    from .services import assets
+    assets.init_app(app)
+
     # Error Handlers
     @app.errorhandler(404)
     def page_not_found(e):
@@ -39,9 +65,9 @@ def create_app(config_class=Config):
         return render_template('errors/500.html'), 500
 
     # User Loader
-    from .models import User
+    from .services import user_cache
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return user_cache.load(user_id)
 
     return app
@@ -0,0 +1,322 @@
+// Admin pages (admin/base.html and the pages extending it)
+
+const sidebar = document.getElementById('sidebar');
+const overlay = document.getElementById('sidebarOverlay');
+const toggle = document.getElementById('sidebarToggle');
+const close = document.getElementById('sidebarClose');
+
+function toggleSidebar() {
+    sidebar.classList.toggle('-translate-x-full');
+    overlay.classList.toggle('hidden');
+    setTimeout(() => overlay.classList.toggle('opacity-100'), 10);
+    document.body.classList.toggle('overflow-hidden');
+}
+
+toggle?.addEventListener('click', toggleSidebar);
+close?.addEventListener('click', toggleSidebar);
+overlay?.addEventListener('click', toggleSidebar);
+
+// Prevent FOUC
+document.addEventListener('DOMContentLoaded', () => {
+    setTimeout(() => {
+        document.body.classList.remove('fouc-cloak');
+    }, 100);
+});
+
+// Orders page: live updates and in-place status changes
+(function () {
+    const body = document.getElementById('ordersBody');
+    if (!body) return;
+    const page = JSON.parse(document.getElementById('ordersConfig').textContent);
+    const filters = page.filters;
+    // New orders are only inserted on the newest page with no search/date filter
+    const acceptsNew = page.acceptsNew;
+    let cursor = page.cursor;
+
+    function matches(event) {
+        if (event.is_deleted) return false;
+        if (filters.status && event.status !== filters.status) return false;
+        if (filters.type && event.order_type !== filters.type) return false;
+        return true;
+    }
+
+    function rowFromHtml(html) {
+        const template = document.createElement('template');
+        template.innerHTML = html.trim();
+        return template.content.firstElementChild;
+    }
+
+    // Swap in a freshly rendered row, keeping it selected if it was
+    function replaceRow(existing, row) {
+        const box = existing.querySelector('.order-select');
+        if (box && box.checked) row.querySelector('.order-select').checked = true;
+        existing.replaceWith(row);
+    }
+
+    function apply(event) {
+        if (event.cursor && event.cursor > cursor) cursor = event.cursor;
+        const existing = body.querySelector(`tr[data-order-id="${event.order_id}"]`);
+        if (!matches(event)) {
+            if (existing) {
+                existing.remove();
+                updateBulkBar();
+            }
+            return;
+        }
+        if (!event.html) return;
+        const row = rowFromHtml(event.html);
+        if (existing) {
+            replaceRow(existing, row);
+        } else if (acceptsNew) {
+            const empty = document.getElementById('ordersEmpty');
+            if (empty) empty.remove();
+            body.prepend(row);
+        }
+    }
+
+    function longPoll() {
+        fetch(`${page.changesUrl}?since=${encodeURIComponent(cursor)}`, { headers: { 'Accept': 'application/json' } })
+            .then(r => r.ok ? r.json() : Promise.reject(r.status))
+            .then(data => {
+                data.events.forEach(apply);
+                if (data.cursor > cursor) cursor = data.cursor;
+                longPoll();
+            })
+            .catch(() => setTimeout(longPoll, 5000));
+    }
+
+    if (window.EventSource) {
+        // The server closes the stream every ~25s; EventSource reconnects with Last-Event-ID
+        const source = new EventSource(`${page.streamUrl}?since=${encodeURIComponent(cursor)}`);
+        source.addEventListener('order', e => apply(JSON.parse(e.data)));
+    } else {
+        longPoll();
+    }
+
+    // Status buttons update the row in place instead of reloading the page
+    body.addEventListener('click', e => {
+        const link = e.target.closest('a.order-action');
+        if (!link) return;
+        e.preventDefault();
+        if (link.dataset.confirm && !confirm(link.dataset.confirm)) return;
+        fetch(link.href, { headers: { 'Accept': 'application/json' } })
+            .then(r => r.ok ? r.json() : Promise.reject(r.status))
+            .then(data => {
+                const row = link.closest('tr');
+                if (data.is_deleted) {
+                    row.remove();
+                } else if (filters.status && data.status !== filters.status) {
+                    row.remove();
+                } else {
+                    replaceRow(row, rowFromHtml(data.html));
+                }
+                updateBulkBar();
+            })
+            .catch(() => { window.location.href = link.href; });
+    });
+
+    // Bulk actions: one request for every selected order. Each order carries
+    // the updated_at it was rendered with; orders changed elsewhere since are
+    // sent back as conflicts and refreshed instead of overwritten.
+    const bulkBar = document.getElementById('ordersBulkBar');
+    const bulkCount = document.getElementById('ordersBulkCount');
+    const bulkMessage = document.getElementById('ordersBulkMessage');
+    const selectAll = document.getElementById('ordersSelectAll');
+
+    function selectedRows() {
+        return [...body.querySelectorAll('.order-select:checked')].map(box => box.closest('tr'));
+    }
+
+    function updateBulkBar() {
+        const count = selectedRows().length;
+        bulkCount.textContent = count;
+        bulkBar.classList.toggle('hidden', count === 0);
+        const boxes = body.querySelectorAll('.order-select');
+        selectAll.checked = count > 0 && count === boxes.length;
+        selectAll.indeterminate = count > 0 && count < boxes.length;
+    }
+
+    function applyBulkRow(data, keepSelected) {
+        const existing = body.querySelector(`tr[data-order-id="${data.order_id}"]`);
+        if (!existing) return;
+        if (data.is_deleted || (filters.status && data.status !== filters.status)) {
+            existing.remove();
+            return;
+        }
+        const row = rowFromHtml(data.html);
+        existing.replaceWith(row);
+        if (keepSelected) row.querySelector('.order-select').checked = true;
+    }
+
+    body.addEventListener('change', e => {
+        if (e.target.classList.contains('order-select')) updateBulkBar();
+    });
+
+    selectAll.addEventListener('change', () => {
+        body.querySelectorAll('.order-select').forEach(box => { box.checked = selectAll.checked; });
+        updateBulkBar();
+    });
+
+    document.getElementById('ordersBulkClear').addEventListener('click', () => {
+        body.querySelectorAll('.order-select:checked').forEach(box => { box.checked = false; });
+        bulkMessage.textContent = '';
+        updateBulkBar();
+    });
+
+    bulkBar.addEventListener('click', e => {
+        const button = e.target.closest('button[data-bulk-action]');
+        if (!button) return;
+        if (button.dataset.confirm && !confirm(button.dataset.confirm)) return;
+        const rows = selectedRows();
+        if (!rows.length) return;
+        const expected = {};
+        rows.forEach(row => {
+            if (row.dataset.updatedAt) expected[row.dataset.orderId] = row.dataset.updatedAt;
+        });
+        const buttons = bulkBar.querySelectorAll('button');
+        buttons.forEach(b => { b.disabled = true; });
+        bulkMessage.textContent = 'Saving...';
+        fetch(page.bulkUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'application/json',
+                'X-CSRFToken': page.csrfToken
+            },
+            body: JSON.stringify({
+                ids: rows.map(row => Number(row.dataset.orderId)),
+                action: button.dataset.bulkAction,
+                status: button.dataset.bulkStatus,
+                expected: expected
+            })
+        })
+            .then(r => r.ok ? r.json() : r.json().then(data => Promise.reject(data.error), () => Promise.reject(r.status)))
+            .then(data => {
+                data.changed.forEach(row => applyBulkRow(row, false));
+                // Conflicting orders stay selected, showing their current state
+                data.conflicts.forEach(row => applyBulkRow(row, true));
+                data.skipped.forEach(id => {
+                    const box = body.querySelector(`tr[data-order-id="${id}"] .order-select`);
+                    if (box) box.checked = false;
+                });
+                bulkMessage.textContent = data.conflicts.length
+                    ? `${data.changed.length} updated, ${data.conflicts.length} changed elsewhere - check them and retry`
+                    : `${data.changed.length} updated`;
+            })
+            .catch(error => {
+                bulkMessage.textContent = typeof error === 'string' ? error : 'Could not update the orders, please retry';
+            })
+            .finally(() => {
+                buttons.forEach(b => { b.disabled = false; });
+                updateBulkBar();
+            });
+    });
+})();
+
+// Kitchen page: polls the queue; the server answers 304 until it changes
+(function () {
+    const dishes = document.getElementById('kitchenDishes');
+    if (!dishes) return;
+    const page = JSON.parse(document.getElementById('kitchenConfig').textContent);
+    const timeline = document.getElementById('kitchenTimeline');
+    const status = document.getElementById('kitchenStatus');
+    let version = null;
+
+    function el(tag, className, text) {
+        const node = document.createElement(tag);
+        if (className) node.className = className;
+        if (text !== undefined) node.textContent = text;
+        return node;
+    }
+
+    function render(data) {
+        document.getElementById('kitchenPending').textContent = data.pending_orders;
+        document.getElementById('kitchenAtStall').textContent = data.at_stall_orders;
+
+        dishes.replaceChildren(...data.dishes.map(dish => {
+            const card = el('div', 'flex items-center justify-between gap-4 p-4 rounded-xl bg-slate-50 dark:bg-slate-900/50');
+            const label = el('div');
+            label.append(el('div', 'font-bold', dish.name),
+                el('div', 'text-xs text-slate-500', `${dish.orders} order${dish.orders === 1 ? '' : 's'}`));
+            card.append(label, el('div', 'text-3xl font-black text-primary', dish.quantity));
+            return card;
+        }));
+        document.getElementById('kitchenDishesEmpty').classList.toggle('hidden', data.dishes.length > 0);
+
+        timeline.replaceChildren(...data.timeline.map(slot => {
+            const item = el('li', 'border-l-4 border-rose-200 pl-4');
+            item.append(el('div', 'text-sm font-black text-rose-500 uppercase', slot.arrival || 'No time given'));
+            item.append(el('div', 'text-xs font-bold text-slate-500 mt-1',
+                slot.items.map(i => `${i.quantity}x ${i.name}`).join(', ')));
+            const orders = el('ul', 'mt-2 space-y-1 text-xs text-slate-400');
+            slot.orders.forEach(order => {
+                orders.append(el('li', '', `#${order.order_id} ${order.customer_name || 'Anonymous'}: ` +
+                    order.items.map(i => `${i.quantity}x ${i.name}`).join(', ')));
+            });
+            item.append(orders);
+            return item;
+        }));
+        document.getElementById('kitchenTimelineEmpty').classList.toggle('hidden', data.timeline.length > 0);
+    }
+
+    function poll() {
+        // The browser revalidates with If-None-Match and hands back the cached body on a 304
+        fetch(page.queueUrl, { headers: { 'Accept': 'application/json' }, cache: 'no-cache' })
+            .then(r => r.ok ? r.json() : Promise.reject(r.status))
+            .then(data => {
+                if (data.version !== version) render(data);
+                version = data.version;
+                status.textContent = `Updated ${new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit', second: '2-digit' })}`;
+            })
+            .catch(() => { status.textContent = 'Reconnecting...'; })
+            .finally(() => setTimeout(poll, page.refreshSeconds * 1000));
+    }
+
+    poll();
+})();
+
+// Menu items page: add/edit modal and search
+const modal = document.getElementById('itemModal');
+const form = document.getElementById('itemForm');
+
+function openAddModal() {
+    document.getElementById('modalTitle').textContent = 'Add New Dish';
+    form.action = form.dataset.addUrl;
+    form.reset();
+    document.getElementById('availabilityToggle').classList.add('hidden');
+    modal.classList.remove('hidden');
+}
+
+function openEditModal(item) {
+    document.getElementById('modalTitle').textContent = 'Edit Dish';
+    form.action = `/admin/items/edit/${item.id}`;
+
+    document.getElementById('itemName').value = item.name;
+    document.getElementById('itemPrice').value = item.price;
+    document.getElementById('itemCategory').value = item.category_id;
+    document.getElementById('itemDesc').value = item.description;
+    document.getElementById('itemNonVeg').checked = item.is_non_veg;
+    document.getElementById('itemAvailable').checked = item.is_available;
+
+    document.getElementById('availabilityToggle').classList.remove('hidden');
+    modal.classList.remove('hidden');
+}
+
+function closeModal() {
+    modal.classList.add('hidden');
+}
+
+function filterItems() {
+    const query = document.getElementById('itemSearch').value.toLowerCase();
+    const cards = document.querySelectorAll('.item-card');
+
+    cards.forEach(card => {
+        const name = card.dataset.name;
+        const cat = card.dataset.cat;
+        if (name.includes(query) || cat.includes(query)) {
+            card.classList.remove('hidden');
+        } else {
+            card.classList.add('hidden');
+        }
+    });
+}
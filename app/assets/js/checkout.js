@@ -0,0 +1,128 @@
+// Checkout page (public/order_choice.html)
+
+let currentOrderData = null;
+const checkout = JSON.parse(document.getElementById('checkoutConfig').textContent);
+let upiId = checkout.upiId;
+let storeName = "The Food Palace";
+// One key per checkout: retries and double taps must not create a second order
+const checkoutKey = window.crypto && crypto.randomUUID
+    ? crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+
+document.addEventListener('DOMContentLoaded', () => {
+    const cart = JSON.parse(localStorage.getItem('streetbite_cart')) || [];
+    if (cart.length === 0) {
+        window.location.href = checkout.menuUrl;
+        return;
+    }
+    const total = cart.reduce((sum, item) => sum + (item.price * item.quantity), 0);
+    document.getElementById('totalSummary').textContent = `Total Items: ${cart.length} | Total Price: ₹${total}`;
+});
+
+async function processCheckout(orderType) {
+    const name = document.getElementById('custName').value;
+    const phone = document.getElementById('custPhone').value;
+    const arrivalTimeValue = document.getElementById('arrivalTime').value;
+    const cart = JSON.parse(localStorage.getItem('streetbite_cart')) || [];
+
+    if (orderType === 'Pre-book' && !arrivalTimeValue) {
+        alert('Please select an estimated arrival time for Pre-booking.');
+        return;
+    }
+
+    if (cart.length === 0) {
+        alert('Your cart is empty!');
+        window.location.href = checkout.menuUrl;
+        return;
+    }
+
+    const total_price = cart.reduce((sum, item) => sum + (item.price * item.quantity), 0);
+
+    const buttons = document.querySelectorAll('#checkoutForm button');
+    buttons.forEach(b => b.disabled = true);
+
+    try {
+        const response = await fetch(checkout.createOrderUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': checkout.csrfToken,
+                'Idempotency-Key': checkoutKey
+            },
+            body: JSON.stringify({
+                name, phone, order_type: orderType, arrival_time: orderType === 'Pre-book' ? arrivalTimeValue : null, total_price, items: cart
+            })
+        });
+
+        if (response.ok) {
+            const data = await response.json();
+            // The server prices the order; show its total rather than the cart's
+            const total = data.total_price ?? total_price;
+            currentOrderData = { id: data.order_id, cart, total, orderType, name, phone, arrivalTime: orderType === 'Pre-book' ? arrivalTimeValue : 'N/A' };
+
+            if (orderType === 'Pre-book') {
+                showPaymentModal(total, data.order_id);
+            } else {
+                window.location.href = `/order-success/${data.order_id}`;
+            }
+        } else if (response.status === 409) {
+            const data = await response.json();
+            alert(data.error);
+            window.location.href = checkout.menuUrl;
+        } else if (response.status === 429 || response.status === 503) {
+            // Busy; the same Idempotency-Key makes trying again safe
+            const data = await response.json().catch(() => ({}));
+            alert(data.error || 'We are very busy right now. Please try again in a moment.');
+            buttons.forEach(b => b.disabled = false);
+        } else {
+            alert('Something went wrong. Please try again.');
+            buttons.forEach(b => b.disabled = false);
+        }
+    } catch (e) {
+        console.error(e);
+        alert('Error connecting to server.');
+        buttons.forEach(b => b.disabled = false);
+    }
+}
+
+
+function showPaymentModal(total, orderId) {
+    const advance = (total * 0.5).toFixed(2);
+    document.getElementById('advanceAmount').textContent = `₹${advance}`;
+    document.getElementById('totalPriceLabel').textContent = `50% OF TOTAL (₹${total})`;
+
+    const upiUrl = `upi://pay?pa=${upiId}&pn=${encodeURIComponent(storeName)}&am=${advance}&tr=${orderId}&cu=INR&tn=${encodeURIComponent('Advance for Order #' + orderId)}`;
+    const qrUrl = `https://api.qrserver.com/v1/create-qr-code/?size=250x250&data=${encodeURIComponent(upiUrl)}`;
+    document.getElementById('qrImage').src = qrUrl;
+
+    const modal = document.getElementById('paymentModal');
+    modal.classList.remove('hidden');
+    setTimeout(() => {
+        modal.classList.add('opacity-100');
+        modal.firstElementChild.classList.remove('scale-95');
+    }, 10);
+}
+
+function closePaymentModal() {
+    const modal = document.getElementById('paymentModal');
+    modal.classList.remove('opacity-100');
+    modal.firstElementChild.classList.add('scale-95');
+    setTimeout(() => modal.classList.add('hidden'), 300);
+    const buttons = document.querySelectorAll('#checkoutForm button');
+    buttons.forEach(b => b.disabled = false);
+}
+
+function confirmOrderAfterPayment() {
+    if (!currentOrderData) return;
+    window.location.href = `/order-success/${currentOrderData.id}`;
+}
+
+function finalizeWhatsAppOrder(data, isPaid = false) {
+    localStorage.removeItem('streetbite_cart');
+    let itemStr = data.cart.map(i => `- ${i.name} x${i.quantity}`).join('%0A');
+    let status = isPaid ? "✅ *ADVANCE PAID (50%)*" : "⏳ *Pay at Stall*";
+    let arrivalStr = data.orderType === 'Pre-book' ? `%0AArrival Time: *${data.arrivalTime}*` : "";
+    let message = `Hello! I would like to place an ${data.orderType} order.%0A%0AOrder ID: *#${data.id}*%0AStatus: ${status}%0A%0AItems:%0A${itemStr}${arrivalStr}%0A%0ATotal: ₹${data.total}%0A%0AName: ${data.name || 'N/A'}%0APhone: ${data.phone || 'N/A'}`;
+    const waUrl = `https://wa.me/${checkout.whatsappPhone}?text=${message}`;
+    window.location.href = waUrl;
+}
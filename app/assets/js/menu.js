@@ -0,0 +1,106 @@
+// Menu page (public/menu.html): server-side search, filters and infinite scroll
+
+const menuPage = JSON.parse(document.getElementById('menuConfig').textContent);
+const ACTIVE_CSS = menuPage.activeCss.split(' ');
+const IDLE_CSS = menuPage.idleCss.split(' ');
+const menuList = document.getElementById('menuList');
+const menuState = menuPage.state;
+let pending = null;
+
+function setActive(el, active) {
+    el.classList.remove(...(active ? IDLE_CSS : ACTIVE_CSS));
+    el.classList.add(...(active ? ACTIVE_CSS : IDLE_CSS));
+}
+
+function menuQuery() {
+    const params = new URLSearchParams();
+    Object.entries(menuState).forEach(([key, value]) => { if (value) params.set(key, value); });
+    return params.toString();
+}
+
+// Fetch a page of cards from the server; replace the list for a new search, append for the next page
+async function loadItems(url, replace) {
+    if (pending) pending.abort();
+    pending = new AbortController();
+    try {
+        const response = await fetch(url, { signal: pending.signal });
+        if (!response.ok) return;
+        const html = await response.text();
+        if (replace) {
+            menuList.innerHTML = html;
+        } else {
+            menuList.querySelectorAll('.menu-more').forEach(el => el.remove());
+            menuList.insertAdjacentHTML('beforeend', html);
+        }
+        watchMore();
+    } catch (e) {
+        if (e.name !== 'AbortError') console.error(e);
+    }
+}
+
+function refresh() {
+    const query = menuQuery();
+    history.replaceState(null, '', menuPage.menuUrl + (query ? '?' + query : ''));
+    loadItems(menuPage.itemsUrl + (query ? '?' + query : ''), true);
+}
+
+// Infinite scroll: load the next page when its "Load more" link comes into view
+const moreObserver = 'IntersectionObserver' in window ? new IntersectionObserver(entries => {
+    entries.forEach(entry => {
+        if (!entry.isIntersecting) return;
+        moreObserver.unobserve(entry.target);
+        loadItems(entry.target.dataset.next, false);
+    });
+}, { rootMargin: '400px' }) : null;
+
+function watchMore() {
+    menuList.querySelectorAll('.menu-more').forEach(el => {
+        if (moreObserver) moreObserver.observe(el);
+    });
+}
+
+menuList.addEventListener('click', (e) => {
+    const more = e.target.closest('.menu-more');
+    if (!more) return;
+    e.preventDefault();
+    loadItems(more.dataset.next, false);
+});
+
+document.querySelectorAll('.cat-btn').forEach(btn => {
+    btn.addEventListener('click', (e) => {
+        e.preventDefault();
+        menuState.category = btn.dataset.category;
+        document.querySelectorAll('.cat-btn').forEach(b => setActive(b, b === btn));
+        refresh();
+    });
+});
+
+document.getElementById('vegToggle').addEventListener('click', (e) => {
+    e.preventDefault();
+    menuState.veg = menuState.veg ? '' : '1';
+    setActive(e.currentTarget, !!menuState.veg);
+    refresh();
+});
+
+// Search as you type, once the customer pauses
+let searchTimer = null;
+document.getElementById('menuSearch').addEventListener('input', (e) => {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => {
+        menuState.q = e.target.value.trim();
+        refresh();
+    }, 250);
+});
+document.getElementById('menuFilters').addEventListener('submit', (e) => {
+    e.preventDefault();
+    clearTimeout(searchTimer);
+    menuState.q = document.getElementById('menuSearch').value.trim();
+    refresh();
+});
+
+watchMore();
+
+function orderNow(item) {
+    addToCart(item);
+    window.location.href = menuPage.orderChoiceUrl;
+}
@@ -0,0 +1,117 @@
+// Every page built on base.html: flash messages and the cart drawer
+
+// Auto-hide flashes
+setTimeout(() => {
+    document.querySelectorAll('.animate-bounce-short').forEach(el => {
+        el.style.opacity = '0';
+        el.style.transition = 'opacity 0.5s';
+        setTimeout(() => el.remove(), 500);
+    });
+}, 3000);
+
+let cart = JSON.parse(localStorage.getItem('streetbite_cart')) || [];
+
+function updateCartUI() {
+    const badge = document.getElementById('cartBadge');
+    const itemsContainer = document.getElementById('cartItems');
+    const footer = document.getElementById('cartFooter');
+    const totalEl = document.getElementById('cartTotal');
+    const checkoutBtn = document.getElementById('checkoutBtn');
+
+    const count = cart.reduce((sum, item) => sum + item.quantity, 0);
+    if (count > 0) {
+        badge.textContent = count;
+        badge.classList.remove('hidden');
+    } else {
+        badge.classList.add('hidden');
+    }
+
+    if (cart.length === 0) {
+        itemsContainer.innerHTML = `<div class="empty-cart flex flex-col items-center justify-center h-full text-slate-400 text-center"><span class="material-symbols-outlined text-6xl mb-2">production_quantity_limits</span><p class="font-bold">Your cart is empty</p></div>`;
+        footer.classList.add('hidden');
+    } else {
+        footer.classList.remove('hidden');
+        let total = 0;
+        itemsContainer.innerHTML = cart.map((item, index) => {
+            const subtotal = item.price * item.quantity;
+            total += subtotal;
+            return `
+            <div class="flex gap-4 bg-slate-50 dark:bg-slate-800/50 p-3 rounded-xl border border-slate-100 dark:border-slate-800">
+                <div class="flex-1">
+                    <h4 class="font-bold text-sm line-clamp-1">${item.name}</h4>
+                    <div class="text-xs text-slate-500 mt-1">₹${item.price} × ${item.quantity}</div>
+                </div>
+                <div class="flex flex-col items-end gap-2">
+                    <div class="font-black text-sm text-primary">₹${subtotal}</div>
+                    <div class="flex items-center gap-2 bg-white dark:bg-slate-800 rounded-lg p-1 border border-slate-200 dark:border-slate-700">
+                        <button onclick="changeQty(${index}, -1)" class="size-6 flex items-center justify-center text-slate-400 hover:text-primary"><span class="material-symbols-outlined text-sm">remove</span></button>
+                        <span class="text-xs font-bold w-4 text-center">${item.quantity}</span>
+                        <button onclick="changeQty(${index}, 1)" class="size-6 flex items-center justify-center text-slate-400 hover:text-primary"><span class="material-symbols-outlined text-sm">add</span></button>
+                    </div>
+                </div>
+            </div>`;
+        }).join('');
+        totalEl.textContent = `₹${total}`;
+    }
+}
+
+function addToCart(item) {
+    const existing = cart.find(c => c.id === item.id);
+    if (existing) { existing.quantity += 1; }
+    else { cart.push({ ...item, quantity: 1 }); }
+    localStorage.setItem('streetbite_cart', JSON.stringify(cart));
+    updateCartUI();
+    const trigger = document.getElementById('cartDrawerTrigger').firstElementChild;
+    trigger.classList.add('scale-125');
+    setTimeout(() => trigger.classList.remove('scale-125'), 200);
+}
+
+function changeQty(index, delta) {
+    cart[index].quantity += delta;
+    if (cart[index].quantity <= 0) { cart.splice(index, 1); }
+    localStorage.setItem('streetbite_cart', JSON.stringify(cart));
+    updateCartUI();
+}
+
+function toggleCartDrawer() {
+    const drawer = document.getElementById('cartDrawer');
+    const overlay = document.getElementById('cartOverlay');
+    const isOpen = drawer.classList.contains('translate-x-0');
+    if (isOpen) {
+        drawer.classList.add('translate-x-full'); drawer.classList.remove('translate-x-0');
+        overlay.classList.add('opacity-0', 'hidden'); overlay.classList.remove('opacity-100');
+    } else {
+        drawer.classList.remove('translate-x-full'); drawer.classList.add('translate-x-0');
+        overlay.classList.remove('hidden');
+        setTimeout(() => { overlay.classList.add('opacity-100'); overlay.classList.remove('opacity-0'); }, 10);
+        updateCartUI();
+    }
+}
+
+// Refresh prices and availability of items already in the cart.
+// /api/menu is revalidated with its ETag, so this is usually a 304.
+async function refreshCart() {
+    if (cart.length === 0) return;
+    try {
+        const response = await fetch(document.getElementById('cartDrawer').dataset.menuApi);
+        if (!response.ok) return;
+        const menu = await response.json();
+        const items = new Map(menu.items.map(item => [item.id, item]));
+        cart = cart.filter(c => items.has(c.id)).map(c => ({ ...items.get(c.id), quantity: c.quantity }));
+        localStorage.setItem('streetbite_cart', JSON.stringify(cart));
+        updateCartUI();
+    } catch (e) {
+        console.error(e);
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    // Admin and auth error pages share the layout but have no cart
+    if (document.getElementById('cartDrawer')) {
+        updateCartUI();
+        refreshCart();
+    }
+    setTimeout(() => {
+        document.body.classList.remove('fouc-cloak');
+    }, 100);
+});
@@ -0,0 +1,25 @@
+// Tailwind for the Flask templates, compiled by build_assets.py; same theme
+// as the CDN config in templates/_tailwind.html. (tailwind.config.js at the
+// project root belongs to the Vite pages.)
+module.exports = {
+    darkMode: 'class',
+    content: [
+        './app/templates/**/*.html',
+        './app/assets/js/**/*.js',
+    ],
+    theme: {
+        extend: {
+            colors: {
+                'primary': '#e11d48',
+                'background-light': '#f8f7f5',
+                'background-dark': '#221a10',
+            },
+            fontFamily: { 'display': ['Inter', 'sans-serif'] },
+            borderRadius: { 'DEFAULT': '1rem', 'lg': '2rem', 'xl': '3rem' },
+        },
+    },
+    plugins: [
+        require('@tailwindcss/forms'),
+        require('@tailwindcss/container-queries'),
+    ],
+}
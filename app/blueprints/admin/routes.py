@@ -1,11 +1,17 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, Response, stream_with_context, abort
 from flask_login import login_required
-from app.models import MenuItem, Category, Setting, PageView, Order, OrderItem, User
+from app.models import MenuItem, Category, Setting, PageView, Order, OrderItem, User, DailySales, DailyItemSales, ArchivedOrder, ArchivedOrderItem
 import bcrypt
+import hmac
 from app.extensions import db
-from app.services.image_service import save_image, delete_image
+from app.services.image_service import save_image, delete_image, schedule_variants
+from app.services import settings_cache, page_views, menu_cache, db_pool, order_feed, profiler, sales_export, user_cache, archive, bulk_orders, kitchen_queue, order_intake
 from datetime import date, timedelta, datetime
-from sqlalchemy import func, text
+import json
+import queue
+import time
+from sqlalchemy import func, or_, tuple_
+from sqlalchemy.orm import selectinload
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -14,36 +20,26 @@ admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 def dashboard():
     total_items = MenuItem.query.count()
     total_categories = Category.query.count()
-    total_orders = Order.query.filter_by(is_deleted=False).count()
+    total_orders = db.session.query(func.sum(DailySales.order_count)).scalar() or 0
     
     today = date.today()
     
-    # Advanced Stats
-    # Today's Sales (Completed only)
-    today_sales = db.session.query(func.sum(Order.total_price)).filter(
-        func.date(Order.created_at) == today,
-        Order.status.in_(['Pending', 'Completed']),
-        Order.is_deleted == False
-    ).scalar() or 0
+    # Advanced Stats (read from the daily_sales rollup, see services/sales_rollup.py)
+    thirty_days_ago = today - timedelta(days=30)
+    daily_sales = {row.date: row.sales_total for row in DailySales.query.filter(DailySales.date >= thirty_days_ago)}
+
+    # Today's Sales (Pending + Completed)
+    today_sales = daily_sales.get(today, 0)
     
     # Last 30 Days Sales
-    thirty_days_ago = today - timedelta(days=30)
-    thirty_day_sales = db.session.query(func.sum(Order.total_price)).filter(
-        Order.created_at >= thirty_days_ago,
-        Order.status.in_(['Pending', 'Completed']),
-        Order.is_deleted == False
-    ).scalar() or 0
+    thirty_day_sales = sum(daily_sales.values())
     
     # 7 Day Sales Trend
     sales_trend = []
     max_sale = 0
     for i in range(6, -1, -1):
         day = today - timedelta(days=i)
-        s = db.session.query(func.sum(Order.total_price)).filter(
-            func.date(Order.created_at) == day,
-            Order.status.in_(['Pending', 'Completed']),
-            Order.is_deleted == False
-        ).scalar() or 0
+        s = daily_sales.get(day, 0)
         if s > max_sale: max_sale = s
         sales_trend.append({
             'label': day.strftime('%a'),
@@ -52,7 +48,6 @@ def dashboard():
     
     # Add percentage height for trend chart
     for day in sales_trend:
-        # max_sale is already a number (scalar returns None or number)
         if max_sale and float(max_sale) > 0:
             day['height'] = int((float(day['value']) / float(max_sale) * 100))
         else:
@@ -62,17 +57,21 @@ def dashboard():
     most_ordered_today = db.session.query(
         MenuItem.name, 
         MenuItem.image_path,
-        func.sum(OrderItem.quantity).label('qty')
-    ).join(OrderItem).join(Order).filter(
-        func.date(Order.created_at) == today,
-        Order.status != 'Cancelled',
-        Order.is_deleted == False
-    ).group_by(MenuItem.id).order_by(text('qty DESC')).limit(5).all()
+        MenuItem.image_variants,
+        DailyItemSales.quantity.label('qty')
+    ).join(DailyItemSales, DailyItemSales.menu_item_id == MenuItem.id).filter(
+        DailyItemSales.date == today,
+        DailyItemSales.quantity > 0
+    ).order_by(DailyItemSales.quantity.desc()).limit(5).all()
 
     today_views = PageView.query.filter_by(date=today).first()
-    today_count = today_views.count if today_views else 0
+    today_count = (today_views.count if today_views else 0) + page_views.pending_count(today)
     
     recent_orders = Order.query.filter_by(is_deleted=False).order_by(Order.created_at.desc()).limit(5).all()
+
+    # Intake limits and how often they bite; the Pending count is the kitchen queue's
+    kitchen_state = kitchen_queue.get_queue()
+    kitchen_state.refresh()
     
     return render_template('admin/dashboard.html', 
                            total_items=total_items, 
@@ -83,34 +82,294 @@ def dashboard():
                            sales_trend=sales_trend,
                            most_ordered=most_ordered_today,
                            today_count=today_count,
-                           recent_orders=recent_orders)
+                           recent_orders=recent_orders,
+                           intake=order_intake.get_intake().stats(),
+                           pending_orders=kitchen_state.pending_count())
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def _parse_cursor(value):
+    created_at, _, order_id = value.rpartition('_')
+    return datetime.fromisoformat(created_at), int(order_id)
 
 @admin_bp.route('/orders')
 @login_required
 def orders():
-    all_orders = Order.query.filter_by(is_deleted=False).order_by(Order.created_at.desc()).all()
-    return render_template('admin/orders.html', orders=all_orders)
+    # Filters are kept as plain strings so the template can carry them over into links
+    filters = {k: request.args.get(k, '').strip() for k in ('q', 'status', 'type', 'from', 'to')}
+    filters = {k: v for k, v in filters.items() if v}
+
+    query = Order.query.filter_by(is_deleted=False).options(
+        selectinload(Order.items).joinedload(OrderItem.menu_item)
+    )
+    if 'q' in filters:
+        pattern = f"%{filters['q']}%"
+        query = query.filter(or_(Order.customer_name.ilike(pattern), Order.customer_phone.ilike(pattern)))
+    if filters.get('status') in ['Pending', 'Completed', 'Cancelled']:
+        query = query.filter(Order.status == filters['status'])
+    if filters.get('type') in ['Pre-book', 'At Stall']:
+        query = query.filter(Order.order_type == filters['type'])
+    try:
+        if 'from' in filters:
+            query = query.filter(Order.created_at >= _parse_date(filters['from']))
+        if 'to' in filters:
+            query = query.filter(Order.created_at < _parse_date(filters['to']) + timedelta(days=1))
+    except ValueError:
+        flash('Invalid date filter.', 'error')
+        return redirect(url_for('admin.orders'))
+
+    # Keyset pagination on (created_at, id), newest first
+    before = request.args.get('before')
+    if before:
+        try:
+            created_at, order_id = _parse_cursor(before)
+        except ValueError:
+            return redirect(url_for('admin.orders', **filters))
+        # Row comparison so both backends seek ix_orders_live_created_at directly
+        query = query.filter(tuple_(Order.created_at, Order.id) < tuple_(created_at, order_id))
+
+    page_size = current_app.config['ORDERS_PER_PAGE']
+    page = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(page_size + 1).all()
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_cursor = f"{page[-1].created_at.isoformat()}_{page[-1].id}"
+
+    # Live updates resume from slightly before this render; replaying a change is harmless
+    feed_cursor = (datetime.utcnow() - order_feed.OVERLAP).isoformat()
+    return render_template('admin/orders.html', orders=page, filters=filters,
+                           next_cursor=next_cursor, is_first_page=not before,
+                           feed_cursor=feed_cursor)
+
+def _wants_json():
+    # The orders page patches rows in place instead of following the redirect
+    return request.accept_mimetypes.best == 'application/json'
+
+def _change_order(id, action, status=None):
+    """Change one order through bulk_orders.apply, which locks the row and only
+    moves the rollups for the UPDATE that actually matched. Returns (order, changed)."""
+    changed, conflicts, _ = bulk_orders.apply([id], action, status)
+    if changed:
+        kitchen_queue.track(changed[0])
+        return changed[0], True
+    # Someone else changed it first (conflict), or there was nothing to change
+    return (conflicts[0] if conflicts else Order.query.get_or_404(id)), False
 
 @admin_bp.route('/orders/update-status/<int:id>')
 @login_required
 def update_order_status(id):
-    order = Order.query.get_or_404(id)
     new_status = request.args.get('status')
-    if new_status in ['Pending', 'Completed', 'Cancelled']:
-        order.status = new_status
-        db.session.commit()
-        flash(f'Order #{id} status updated to {new_status}.', 'success')
+    if new_status in bulk_orders.STATUSES:
+        order, changed = _change_order(id, 'status', new_status)
+        if _wants_json():
+            return {'order_id': order.id, 'status': order.status,
+                    'html': render_template('admin/_order_row.html', order=order)}
+        if changed or order.status == new_status:
+            flash(f'Order #{id} status updated to {new_status}.', 'success')
+        else:
+            flash(f'Order #{id} was changed by someone else and is now {order.status}.', 'error')
+    elif _wants_json():
+        return {'error': 'Invalid status'}, 400
     return redirect(url_for('admin.orders'))
 
 @admin_bp.route('/orders/delete/<int:id>')
 @login_required
 def delete_order(id):
-    order = Order.query.get_or_404(id)
-    order.is_deleted = True
-    db.session.commit()
-    flash(f'Order #{id} has been deleted.', 'success')
+    order, _ = _change_order(id, 'delete')
+    if _wants_json():
+        return {'order_id': order.id, 'is_deleted': order.is_deleted}
+    if order.is_deleted:
+        flash(f'Order #{id} has been deleted.', 'success')
+    else:
+        flash(f'Order #{id} was changed by someone else; it was not deleted.', 'error')
     return redirect(url_for('admin.orders'))
 
+def _order_json(order):
+    return {'order_id': order.id, 'status': order.status, 'is_deleted': order.is_deleted,
+            'updated_at': order.updated_at.isoformat() if order.updated_at else None,
+            'html': render_template('admin/_order_row.html', order=order)}
+
+@admin_bp.route('/orders/bulk', methods=['POST'])
+@login_required
+def bulk_update_orders():
+    # JSON only: {ids, action: 'status'|'delete', status, expected: {id: updated_at}}
+    try:
+        ids, action, status, expected = bulk_orders.parse(request.get_json(silent=True))
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    changed, conflicts, skipped = bulk_orders.apply(ids, action, status, expected)
+    for order in changed:
+        kitchen_queue.track(order)
+    return {'changed': [_order_json(o) for o in changed],
+            'conflicts': [_order_json(o) for o in conflicts],
+            'skipped': skipped}
+
+@admin_bp.route('/orders/stream')
+@login_required
+def orders_stream():
+    """Server-Sent Events: new orders and status changes after the client's cursor."""
+    feed = order_feed.get_feed()
+    since = order_feed.parse_cursor(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    # Subscribe before reading the backlog so nothing falls between the two
+    q = feed.subscribe()
+    try:
+        backlog = feed.changes_since(since) if since else []
+    except Exception:
+        feed.unsubscribe(q)
+        raise
+    # Nothing below touches the database, so the connection goes back to the pool now
+    db.session.remove()
+    duration = current_app.config['ORDER_FEED_STREAM_SECONDS']
+
+    def format_event(event):
+        return f"id: {event['cursor']}\nevent: order\ndata: {json.dumps(order_feed.public_event(event))}\n\n"
+
+    def stream():
+        yield 'retry: 2000\n\n'
+        for event in backlog:
+            yield format_event(event)
+        # Stay well under worker/proxy timeouts; EventSource reconnects with Last-Event-ID
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            try:
+                yield format_event(q.get(timeout=min(15, max(0.1, deadline - time.monotonic()))))
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+
+    response = Response(stream(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # The server closes the response however the stream ends, even when the
+    # client left before the generator started (its finally would never run)
+    response.call_on_close(lambda: feed.unsubscribe(q))
+    return response
+
+@admin_bp.route('/orders/changes')
+@login_required
+def orders_changes():
+    """Long-poll fallback for clients without EventSource."""
+    feed = order_feed.get_feed()
+    since = order_feed.parse_cursor(request.args.get('since'))
+    if since is None:
+        return {'error': 'since is required'}, 400
+    q = feed.subscribe()
+    try:
+        events = feed.changes_since(since)
+        db.session.remove()
+        if not events:
+            try:
+                events = [q.get(timeout=current_app.config['ORDER_FEED_LONG_POLL_SECONDS'])]
+                while not q.empty():
+                    events.append(q.get_nowait())
+            except queue.Empty:
+                pass
+        events = [e for e in events if e['cursor_at'] > since]
+    finally:
+        feed.unsubscribe(q)
+    cursor = max((e['cursor'] for e in events), default=since.isoformat())
+    return {'cursor': cursor, 'events': [order_feed.public_event(e) for e in events]}
+
+@admin_bp.route('/kitchen')
+@login_required
+def kitchen():
+    return render_template('admin/kitchen.html')
+
+@admin_bp.route('/kitchen/queue')
+@login_required
+def kitchen_queue_data():
+    # Polled by every kitchen screen: answered from memory, 304 until the queue changes
+    kitchen_state = kitchen_queue.get_queue()
+    kitchen_state.refresh()
+    snapshot = kitchen_state.current()
+    etag = f"kitchen-{snapshot['version']}"
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(json.dumps(snapshot), mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@admin_bp.route('/export')
+@login_required
+def export_sales():
+    kind = request.args.get('kind', 'orders')
+    fmt = request.args.get('format', 'csv')
+    status = request.args.get('status') or 'sales'
+    if kind not in sales_export.KINDS or fmt not in sales_export.FORMATS or status not in sales_export.STATUS_FILTERS:
+        return {'error': 'Invalid export options'}, 400
+    try:
+        end = _parse_date(request.args['to']) if request.args.get('to') else date.today()
+        start = _parse_date(request.args['from']) if request.args.get('from') else end - timedelta(days=29)
+    except ValueError:
+        return {'error': 'Dates must be YYYY-MM-DD'}, 400
+    if start > end:
+        return {'error': '"from" is after "to"'}, 400
+
+    chunks = sales_export.export(kind, fmt, start, end, status, include_deleted=request.args.get('include_deleted') == '1')
+    filename = f"sales-{kind}-{start.isoformat()}_{end.isoformat()}.{fmt}"
+    # The session has to stay open while rows stream off the cursor
+    return Response(stream_with_context(chunks),
+                    mimetype='text/csv' if fmt == 'csv' else 'application/json',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"',
+                             'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
+
+@admin_bp.route('/orders/archive')
+@login_required
+def archived_orders():
+    q = request.args.get('q', '').strip()
+    orders = []
+    if q:
+        query = ArchivedOrder.query.options(selectinload(ArchivedOrder.items).joinedload(ArchivedOrderItem.menu_item))
+        if q.lstrip('#').isdigit() and len(q.lstrip('#')) < 9:
+            query = query.filter(ArchivedOrder.id == int(q.lstrip('#')))
+        else:
+            query = query.filter(or_(ArchivedOrder.customer_phone == q, ArchivedOrder.customer_name.ilike(f"%{q}%")))
+        orders = query.order_by(ArchivedOrder.created_at.desc()).limit(current_app.config['ORDERS_PER_PAGE']).all()
+    return render_template('admin/archive.html', orders=orders, q=q)
+
+@admin_bp.route('/cron/archive')
+def cron_archive():
+    # Called by the platform scheduler (e.g. Vercel Cron) with "Authorization: Bearer <CRON_SECRET>"
+    secret = current_app.config['CRON_SECRET']
+    if not secret:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {secret}'):
+        abort(401)
+    archived, batches, more = archive.archive_orders(current_app.config['ARCHIVE_AFTER_DAYS'],
+                                                     max_seconds=current_app.config['ARCHIVE_CRON_SECONDS'])
+    return {'archived': archived, 'batches': batches, 'more': more}
+
+@admin_bp.route('/db-stats')
+@login_required
+def db_stats():
+    return {'profile': current_app.config['DB_PROFILE'], **db_pool.pool_status(db.engine)}
+
+@admin_bp.route('/perf')
+@login_required
+def perf():
+    p = profiler.get_profiler(current_app)
+    return render_template('admin/perf.html', enabled=p is not None, perf=p.snapshot() if p else None,
+                           now=time.time())
+
+@admin_bp.route('/perf.json')
+@login_required
+def perf_json():
+    p = profiler.get_profiler(current_app)
+    if p is None:
+        return {'error': 'Profiler is disabled; set PROFILER=1'}, 404
+    return p.snapshot()
+
+@admin_bp.route('/perf/reset', methods=['POST'])
+@login_required
+def perf_reset():
+    p = profiler.get_profiler(current_app)
+    if p:
+        p.reset()
+        flash('Profiler statistics cleared.', 'success')
+    return redirect(url_for('admin.perf'))
+
 # Categories CRUD
 @admin_bp.route('/categories')
 @login_required
@@ -125,7 +384,9 @@ def add_category():
     if name:
         new_cat = Category(name=name)
         db.session.add(new_cat)
+        menu_cache.bump_version()
         db.session.commit()
+        settings_cache.invalidate()
         flash('Category added!', 'success')
     return redirect(url_for('admin.categories'))
 
@@ -133,8 +394,13 @@ def add_category():
 @login_required
 def delete_category(id):
     cat = Category.query.get_or_404(id)
+    image_paths = {item.image_path for item in cat.items}
     db.session.delete(cat)
+    menu_cache.bump_version()
     db.session.commit()
+    settings_cache.invalidate()
+    for image_path in image_paths:
+        delete_image(image_path)
     flash('Category deleted!', 'success')
     return redirect(url_for('admin.categories'))
 
@@ -167,7 +433,10 @@ def add_item():
         image_path=image_path
     )
     db.session.add(new_item)
+    menu_cache.bump_version()
     db.session.commit()
+    settings_cache.invalidate()
+    schedule_variants(image_path)
     flash('Item added!', 'success')
     return redirect(url_for('admin.items'))
 
@@ -183,11 +452,17 @@ def edit_item(id):
     item.is_available = 'is_available' in request.form
     
     image = request.files.get('image')
+    old_image = item.image_path
     if image:
-        delete_image(item.image_path)
         item.image_path = save_image(image)
+        item.image_variants = None
         
+    menu_cache.bump_version()
     db.session.commit()
+    settings_cache.invalidate()
+    if image:
+        delete_image(old_image)
+        schedule_variants(item.image_path)
     flash('Item updated!', 'success')
     return redirect(url_for('admin.items'))
 
@@ -195,9 +470,12 @@ def edit_item(id):
 @login_required
 def delete_item(id):
     item = MenuItem.query.get_or_404(id)
-    delete_image(item.image_path)
+    image_path = item.image_path
     db.session.delete(item)
+    menu_cache.bump_version()
     db.session.commit()
+    settings_cache.invalidate()
+    delete_image(image_path)
     flash('Item deleted!', 'success')
     return redirect(url_for('admin.items'))
 
@@ -205,26 +483,31 @@ def delete_item(id):
 @admin_bp.route('/settings', methods=['GET', 'POST'])
 @login_required
 def settings():
-    from flask_login import current_user
+    from flask_login import current_user, login_user
     if request.method == 'POST':
         # Check if this is an account update
         if 'update_account' in request.form:
             new_username = request.form.get('username')
             new_password = request.form.get('password')
+            # current_user is a cached identity; change the actual row
+            user = db.session.get(User, current_user.id)
             
             if new_username:
                 # Check if username is already taken by another user
-                existing_user = User.query.filter(User.username == new_username, User.id != current_user.id).first()
+                existing_user = User.query.filter(User.username == new_username, User.id != user.id).first()
                 if existing_user:
                     flash('Username already exists!', 'error')
                     return redirect(url_for('admin.settings'))
-                current_user.username = new_username
+                user.username = new_username
             
             if new_password:
                 hashed_pw = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                current_user.password_hash = hashed_pw
+                user.password_hash = hashed_pw
             
             db.session.commit()
+            user_cache.invalidate(user.id)
+            # A new password changes the session id; keep this session and drop the others
+            login_user(user)
             flash('Account credentials updated!', 'success')
             return redirect(url_for('admin.settings'))
 
@@ -243,7 +526,9 @@ def settings():
         else:
             db.session.add(Setting(key='shop_status', value=status_val))
             
+        menu_cache.bump_version()
         db.session.commit()
+        settings_cache.invalidate()
         flash('Settings updated!', 'success')
         return redirect(url_for('admin.settings'))
         
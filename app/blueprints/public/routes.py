@@ -1,88 +1,164 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from app.models import MenuItem, Category, Setting, PageView, Order, OrderItem
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from app.models import Category, Order, OrderItem
 from app.extensions import db
-from datetime import date
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from app.services.settings_cache import get_settings
+from app.services.storage import get_storage
+from app.services import page_views, sales_rollup, menu_cache, menu_search, kitchen_queue, order_intake
 
 public_bp = Blueprint('public', __name__)
 
 @public_bp.before_request
 def track_views():
     if request.endpoint == 'public.index':
-        today = date.today()
-        view = PageView.query.filter_by(date=today).first()
-        if view:
-            view.count += 1
-        else:
-            view = PageView(date=today, count=1)
-            db.session.add(view)
-        db.session.commit()
+        page_views.record_hit()
 
 @public_bp.route('/')
 def index():
-    settings = {s.key: s.value for s in Setting.query.all()}
+    settings = get_settings()
     return render_template('public/index.html', settings=settings)
 
 @public_bp.route('/menu')
 def menu():
-    categories = Category.query.all()
-    # If a category is selected via query param
-    cat_id = request.args.get('category', type=int)
-    if cat_id:
-        items = MenuItem.query.filter_by(category_id=cat_id, is_available=True).all()
-    else:
-        items = MenuItem.query.filter_by(is_available=True).all()
-        
-    settings = {s.key: s.value for s in Setting.query.all()}
-    return render_template('public/menu.html', items=items, categories=categories, settings=settings)
+    filters = menu_search.parse_filters(request.args)
+
+    def render(settings):
+        categories = Category.query.all()
+        items, next_page = menu_search.search(**filters)
+        return render_template('public/menu.html', items=items, next_page=next_page, categories=categories,
+                               filters=filters, menu_args=menu_search.query_args(filters), settings=settings)
+
+    # Free-text searches are too varied to be worth a slot in the page cache
+    if filters['q']:
+        return render(get_settings())
+    return menu_cache.cached_page(render, 'menu', filters['category'], filters['veg'], filters['page'])
+
+@public_bp.route('/menu/items')
+def menu_items():
+    # One page of menu cards, for infinite scroll and search-as-you-type on the menu page
+    filters = menu_search.parse_filters(request.args)
+
+    def render(settings):
+        items, next_page = menu_search.search(**filters)
+        return render_template('public/_menu_items.html', items=items, next_page=next_page,
+                               filters=filters, menu_args=menu_search.query_args(filters), settings=settings)
+
+    if filters['q']:
+        return render(get_settings())
+    return menu_cache.cached_page(render, 'menu-items', filters['category'], filters['veg'], filters['page'])
+
+@public_bp.route('/api/menu')
+def api_menu():
+    return menu_cache.api_response(request.args.get('since'))
+
+@public_bp.route('/api/menu/search')
+def api_menu_search():
+    return menu_search.api_response()
 
 @public_bp.route('/create-order', methods=['POST'])
 def create_order():
     data = request.json
-    if not data or 'items' not in data:
+    if not data or not data.get('items'):
         return {"error": "Invalid data"}, 400
 
-    settings = {s.key: s.value for s in Setting.query.all()}
+    # Retries and double taps reuse the same key; answer them with the original order
+    key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    key = str(key)[:64] if key else None
+
+    # Over the intake limits the answer is a 429/503 with Retry-After, before any query
+    try:
+        with order_intake.get_intake().admit(data.get('phone'), key):
+            return _place_order(data, key)
+    except order_intake.Rejected as e:
+        return e.response()
+
+def _place_order(data, key):
+    if key:
+        existing = _order_for_key(key)
+        if existing:
+            return existing, 200
+
+    max_age = current_app.config['SHOP_STATUS_MAX_AGE']
+    settings = get_settings(max_age=max_age)
     if settings.get('shop_status') != 'open':
         return {"error": "Shop is closed. Please check back next time."}, 403
-        
+
+    # Price the order server-side from the cached menu; the client's prices are ignored
+    prices = menu_cache.menu_data(max_age=max_age)['prices']
+    quantities = {}
+    try:
+        for item in data['items']:
+            item_id, quantity = int(item['id']), int(item['quantity'])
+            if quantity < 1:
+                raise ValueError
+            quantities[item_id] = quantities.get(item_id, 0) + quantity
+    except (KeyError, TypeError, ValueError):
+        return {"error": "Invalid data"}, 400
+    unavailable = [item_id for item_id in quantities if item_id not in prices]
+    if unavailable:
+        return {"error": "Some items are no longer available. Please review your cart.", "unavailable": unavailable}, 409
+    total_price = round(sum(prices[item_id] * quantity for item_id, quantity in quantities.items()), 2)
+
     try:
         new_order = Order(
             customer_name=data.get('name'),
             customer_phone=data.get('phone'),
             order_type=data.get('order_type'),
             estimated_arrival_time=data.get('arrival_time'),
-            total_price=data.get('total_price'),
-            status='Pending'
+            total_price=total_price,
+            status='Pending',
+            idempotency_key=key
         )
         db.session.add(new_order)
         db.session.flush() # Get order ID
-        
-        for item in data['items']:
-            order_item = OrderItem(
-                order_id=new_order.id,
-                menu_item_id=item['id'],
-                quantity=item['quantity'],
-                price_at_time=item['price']
-            )
-            db.session.add(order_item)
-            
+
+        db.session.execute(insert(OrderItem), [
+            {'order_id': new_order.id, 'menu_item_id': item_id, 'quantity': quantity, 'price_at_time': prices[item_id]}
+            for item_id, quantity in quantities.items()
+        ])
+
+        sales_rollup.record_order_created(new_order, list(quantities.items()))
         db.session.commit()
-        return {"success": True, "order_id": new_order.id}, 201
+    except IntegrityError:
+        # A concurrent request with the same key won the race
+        db.session.rollback()
+        existing = _order_for_key(key) if key else None
+        if existing:
+            return existing, 200
+        return {"error": "Could not place order. Please try again."}, 500
     except Exception as e:
         db.session.rollback()
         return {"error": str(e)}, 500
 
+    kitchen_queue.track(new_order, list(quantities.items()))
+    order_intake.get_intake().record_order(data.get('phone'), key)
+    return {"success": True, "order_id": new_order.id, "total_price": total_price}, 201
+
+def _order_for_key(key):
+    row = db.session.query(Order.id, Order.total_price).filter_by(idempotency_key=key).first()
+    if row:
+        return {"success": True, "order_id": row.id, "total_price": row.total_price}
+
 @public_bp.route('/order-choice')
 def order_choice():
-    settings = {s.key: s.value for s in Setting.query.all()}
+    settings = get_settings()
     if settings.get('shop_status') != 'open':
         flash('Shop is closed. Please check back next time.', 'error')
         return redirect(url_for('public.menu'))
     return render_template('public/order_choice.html', settings=settings)
 
+@public_bp.route('/media/<path:filename>')
+def media(filename):
+    # Uploads are content-addressed, so a URL's content never changes
+    return get_storage().serve(filename)
+
 @public_bp.route('/order-success/<int:order_id>')
 def order_success(order_id):
-    order = Order.query.get_or_404(order_id)
-    settings = {s.key: s.value for s in Setting.query.all()}
+    # One query for the items and their dishes instead of one per line
+    order = Order.query.options(selectinload(Order.items).joinedload(OrderItem.menu_item)) \
+        .filter_by(id=order_id).first_or_404()
+    settings = get_settings()
     phone = settings.get('phone', '').replace(' ', '').replace('+', '')
     return render_template('public/order_success.html', order=order, phone=phone)
@@ -1,3 +1,4 @@
+import hashlib
 from datetime import datetime
 from flask_login import UserMixin
 from .extensions import db
@@ -9,6 +10,14 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(128), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    @property
+    def credential_version(self):
+        # Changes whenever the password does, which invalidates sessions carrying the old one
+        return hashlib.sha256(self.password_hash.encode('utf-8')).hexdigest()[:16]
+
+    def get_id(self):
+        return f"{self.id}:{self.credential_version}"
+
 class Category(db.Model):
     __tablename__ = 'categories'
     id = db.Column(db.Integer, primary_key=True)
@@ -18,15 +27,18 @@ class Category(db.Model):
 
 class MenuItem(db.Model):
     __tablename__ = 'menu_items'
+    __table_args__ = (db.Index('ix_menu_items_category_available', 'category_id', 'is_available'),)
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     price = db.Column(db.Float, nullable=False)
     image_path = db.Column(db.String(255))
+    image_variants = db.Column(db.Text) # JSON: {"webp": {width: filename}, "jpeg": {width: filename}}
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
     is_available = db.Column(db.Boolean, default=True)
     is_non_veg = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def to_dict(self):
         return {
@@ -46,14 +58,42 @@ class PageView(db.Model):
     date = db.Column(db.Date, unique=True, nullable=False)
     count = db.Column(db.Integer, default=0)
 
+class DailySales(db.Model):
+    __tablename__ = 'daily_sales'
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, unique=True, nullable=False)
+    order_count = db.Column(db.Integer, nullable=False, default=0) # Non-deleted orders
+    sales_total = db.Column(db.Float, nullable=False, default=0) # Pending + Completed, non-deleted
+
+class DailyItemSales(db.Model):
+    __tablename__ = 'daily_item_sales'
+    __table_args__ = (db.UniqueConstraint('date', 'menu_item_id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    menu_item_id = db.Column(db.Integer, nullable=False) # No FK so deleting a menu item keeps its history
+    quantity = db.Column(db.Integer, nullable=False, default=0) # Non-cancelled, non-deleted
+
 class Setting(db.Model):
     __tablename__ = 'settings'
     id = db.Column(db.Integer, primary_key=True)
     key = db.Column(db.String(64), unique=True, nullable=False)
     value = db.Column(db.Text)
 
+# Indexes on live (non-deleted) orders only; the predicate matches what
+# `Order.is_deleted == False` renders on each backend. Keep in step with
+# app/services/migrations.py.
+_LIVE_ORDERS = {'sqlite_where': db.text('is_deleted = 0'), 'postgresql_where': db.text('is_deleted = false')}
+
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('ix_orders_live_created_at', 'created_at', 'id', **_LIVE_ORDERS),
+        db.Index('ix_orders_live_status_created_at', 'status', 'created_at', 'id', **_LIVE_ORDERS),
+        db.Index('ix_orders_live_type_created_at', 'order_type', 'created_at', 'id', **_LIVE_ORDERS),
+        db.Index('ix_orders_updated_at', 'updated_at'),
+        # Ids of archived orders are never handed out again (migration 11)
+        {'sqlite_autoincrement': True},
+    )
     id = db.Column(db.Integer, primary_key=True)
     customer_name = db.Column(db.String(100), nullable=True)
     customer_phone = db.Column(db.String(20), nullable=True)
@@ -62,11 +102,17 @@ class Order(db.Model):
     total_price = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(20), default='Pending') # Pending, Completed, Cancelled
     is_deleted = db.Column(db.Boolean, default=False)
+    idempotency_key = db.Column(db.String(64), unique=True, nullable=True) # Client-generated, one per checkout
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # Drives the live order feed
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade="all, delete-orphan")
 
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id'),
+        db.Index('ix_order_items_menu_item_id', 'menu_item_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
     menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_items.id'), nullable=False)
@@ -75,3 +121,39 @@ class OrderItem(db.Model):
     
     # Relationship to get menu item details
     menu_item = db.relationship('MenuItem')
+
+# Orders moved out of the hot tables by app/services/archive.py. Same columns
+# and ids as orders/order_items, without foreign keys, so history survives
+# menu items being deleted. The sales rollups already include these orders.
+class ArchivedOrder(db.Model):
+    __tablename__ = 'orders_archive'
+    __table_args__ = (
+        db.Index('ix_orders_archive_created_at', 'created_at'),
+        db.Index('ix_orders_archive_customer_phone', 'customer_phone'),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    customer_name = db.Column(db.String(100), nullable=True)
+    customer_phone = db.Column(db.String(20), nullable=True)
+    order_type = db.Column(db.String(20), nullable=False)
+    estimated_arrival_time = db.Column(db.String(50), nullable=True)
+    total_price = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20))
+    is_deleted = db.Column(db.Boolean, default=False)
+    idempotency_key = db.Column(db.String(64), nullable=True)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False)
+    items = db.relationship('ArchivedOrderItem', lazy=True, viewonly=True,
+                            primaryjoin='ArchivedOrder.id == foreign(ArchivedOrderItem.order_id)')
+
+class ArchivedOrderItem(db.Model):
+    __tablename__ = 'order_items_archive'
+    __table_args__ = (db.Index('ix_order_items_archive_order_id', 'order_id'),)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_id = db.Column(db.Integer, nullable=False)
+    menu_item_id = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, default=1)
+    price_at_time = db.Column(db.Float, nullable=False)
+
+    menu_item = db.relationship('MenuItem', viewonly=True,
+                                primaryjoin='foreign(ArchivedOrderItem.menu_item_id) == MenuItem.id')
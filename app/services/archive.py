@@ -0,0 +1,102 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert, or_, select
+from app.extensions import db
+from app.models import Order, OrderItem, ArchivedOrder, ArchivedOrderItem
+
+logger = logging.getLogger(__name__)
+
+# Moves orders nobody works with any more out of orders/order_items into
+# orders_archive/order_items_archive, so the hot tables only hold recent and
+# open orders. Eligible: soft-deleted orders, and Completed/Cancelled orders
+# older than ARCHIVE_AFTER_DAYS. Pending orders are never archived.
+#
+# Each batch is one transaction that copies and deletes the same rows, so a
+# run can be interrupted at any point and simply started again. The batch's
+# first statement is a write (and the rows are locked FOR UPDATE on Postgres),
+# so an admin changing one of those orders at the same moment either commits
+# before the batch reads it or waits for the batch to finish.
+#
+# The daily_sales / daily_item_sales rollups are not touched: they already
+# count these orders, and sales_rollup.rebuild() reads both tables.
+
+ARCHIVED_STATUSES = ('Completed', 'Cancelled')
+ORDER_COLUMNS = [c.name for c in Order.__table__.columns]
+ITEM_COLUMNS = [c.name for c in OrderItem.__table__.columns]
+
+
+def _eligible(retention_days):
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    return or_(
+        Order.is_deleted == True,
+        Order.status.in_(ARCHIVED_STATUSES) & (Order.created_at < cutoff),
+    )
+
+
+def eligible_count(retention_days):
+    return db.session.query(Order.id).filter(_eligible(retention_days)).count()
+
+
+def _already_archived():
+    # Only possible for ids handed out again before migration 11
+    return select(ArchivedOrder.id).where(ArchivedOrder.id == Order.id).exists()
+
+
+def _archive_batch(retention_days, batch_size):
+    archived_at = datetime.utcnow()
+    # Concurrent runs skip each other's locked rows instead of waiting (no-op on SQLite)
+    batch = select(Order.id).where(_eligible(retention_days), ~_already_archived()) \
+        .order_by(Order.id).limit(batch_size).with_for_update(skip_locked=True).scalar_subquery()
+
+    # The ids this batch copied; every later statement works on exactly these
+    orders_table = Order.__table__
+    ids = db.session.execute(
+        insert(ArchivedOrder).from_select(
+            ORDER_COLUMNS + ['archived_at'],
+            select(*[orders_table.c[name] for name in ORDER_COLUMNS], db.literal(archived_at))
+            .where(orders_table.c.id.in_(batch))
+        ).returning(ArchivedOrder.id)
+    ).scalars().all()
+    if not ids:
+        db.session.rollback()
+        return 0
+
+    items_table = OrderItem.__table__
+    db.session.execute(
+        insert(ArchivedOrderItem).from_select(
+            ITEM_COLUMNS,
+            select(*[items_table.c[name] for name in ITEM_COLUMNS]).where(items_table.c.order_id.in_(ids))
+        )
+    )
+    db.session.execute(delete(OrderItem).where(OrderItem.order_id.in_(ids)))
+    db.session.execute(delete(Order).where(Order.id.in_(ids)))
+    db.session.commit()
+    return len(ids)
+
+
+def archive_orders(retention_days, batch_size=500, max_seconds=None, max_batches=None):
+    """Archive eligible orders in batches. Returns (orders archived, batches run, whether anything is left)."""
+    started = time.monotonic()
+    archived = batches = 0
+    while True:
+        if max_batches is not None and batches >= max_batches:
+            return archived, batches, True
+        if max_seconds is not None and time.monotonic() - started >= max_seconds:
+            return archived, batches, True
+        moved = _archive_batch(retention_days, batch_size)
+        if not moved:
+            _report_collisions(retention_days)
+            return archived, batches, False
+        archived += moved
+        batches += 1
+        logger.info('Archived %d orders (batch %d)', moved, batches)
+
+
+def _report_collisions(retention_days):
+    ids = db.session.scalars(
+        select(Order.id).where(_eligible(retention_days), _already_archived()).order_by(Order.id).limit(20)
+    ).all()
+    if ids:
+        logger.error('Orders %s have the id of an archived order and were left in place; '
+                     'compare them with orders_archive and resolve by hand', ', '.join(map(str, ids)))
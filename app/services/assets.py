@@ -0,0 +1,194 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import subprocess
+from flask import abort, current_app, request, send_file, url_for
+from app.services.shared_cache import share
+
+# Front-end assets. Sources live in app/assets and are grouped into bundles.
+# `python build_assets.py` minifies each bundle into app/static/dist under a
+# content-hashed name, with .gz and .br copies next to it, and writes
+# manifest.json. rjsmin (JavaScript) and brotli are in requirements.txt; a
+# build without them still works, with unminified JavaScript and no .br files. /assets/<name> then serves the
+# precompressed copy the browser accepts, cached for a year as immutable: a
+# changed file gets a new name, so nothing ever needs revalidating.
+#
+# If node_modules has the Tailwind CLI (`npm install`), the build also
+# compiles the Tailwind classes used by the templates into site.css and
+# admin.css, and the pages stop loading the Tailwind CDN script.
+#
+# Without a build, or with the app in debug mode, asset_url() points at the
+# bundle name and the sources are served concatenated, unminified and
+# uncached, so edits show up on reload.
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets')
+DIST_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'dist')
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+TAILWIND = '@tailwind'  # stands for the compiled Tailwind CSS in a bundle's sources
+
+BUNDLES = {
+    'site.css': [TAILWIND, 'css/site.css'],
+    'admin.css': [TAILWIND, 'css/admin.css'],
+    'site.js': ['js/site.js'],
+    'menu.js': ['js/menu.js'],
+    'checkout.js': ['js/checkout.js'],
+    'admin.js': ['js/admin.js'],
+}
+ONE_YEAR = 31536000
+
+try:
+    import brotli
+except ImportError:  # gzip alone still covers every browser
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:  # JavaScript is then bundled unminified
+    rjsmin = None
+
+
+def _manifest():
+    state = current_app.extensions['assets']
+    if state['manifest'] is None:
+        path = os.path.join(DIST_DIR, 'manifest.json')
+        try:
+            with open(path) as f:
+                state['manifest'] = json.load(f)
+        except (OSError, ValueError):
+            state['manifest'] = {'bundles': {}, 'tailwind': False}
+    return state['manifest']
+
+
+def _use_build():
+    return not current_app.debug and bool(_manifest()['bundles'])
+
+
+def version():
+    """Identifies the current build, for caches of pages that embed asset URLs."""
+    return ','.join(sorted(_manifest()['bundles'].values())) if _use_build() else 'src'
+
+
+def asset_url(name):
+    """URL of a bundle: the fingerprinted build if there is one, else the live sources."""
+    if _use_build():
+        return url_for('assets', filename=_manifest()['bundles'].get(name, name))
+    return url_for('assets', filename=name)
+
+
+def tailwind_built():
+    return _use_build() and _manifest()['tailwind']
+
+
+def _source(name):
+    # Dev fallback: the bundle's files joined as they are
+    parts = []
+    for path in BUNDLES[name]:
+        if path != TAILWIND:
+            with open(os.path.join(SOURCE_DIR, path), encoding='utf-8') as f:
+                parts.append(f.read())
+    return '\n'.join(parts)
+
+
+def serve(filename):
+    built = _use_build() and filename in _manifest()['files']
+    if not built:
+        if filename not in BUNDLES:
+            abort(404)
+        response = current_app.response_class(_source(filename), mimetype=mimetypes.guess_type(filename)[0])
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    path = os.path.join(DIST_DIR, filename)
+    encoding = None
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[candidate] and os.path.exists(path + suffix):
+            encoding, path = candidate, path + suffix
+            break
+    response = send_file(path, mimetype=mimetypes.guess_type(filename)[0], max_age=ONE_YEAR)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return share(response)
+
+
+def init_app(app):
+    app.extensions['assets'] = {'manifest': None}
+    app.add_url_rule('/assets/<path:filename>', 'assets', serve)
+    app.add_template_global(asset_url)
+    app.add_template_global(tailwind_built)
+
+
+# Build
+
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    """Minify with rjsmin when it is installed, otherwise leave the code as it is.
+
+    Telling a regex literal from a division needs a real JavaScript tokenizer;
+    without one, any rewriting next to a / can change what the code does.
+    Comments and indentation compress well, so gzip and brotli still recover
+    most of the difference.
+    """
+    if rjsmin is None:
+        return source
+    return rjsmin.jsmin(source) + '\n'
+
+
+def _tailwind_css():
+    """Compiled, minified Tailwind for the templates, or None when the CLI isn't installed."""
+    cli = os.path.join(PROJECT_DIR, 'node_modules', '.bin', 'tailwindcss')
+    if not os.path.exists(cli):
+        return None
+    result = subprocess.run(
+        [cli, '-c', os.path.join(SOURCE_DIR, 'tailwind.config.cjs'),
+         '-i', os.path.join(SOURCE_DIR, 'css', 'tailwind.css'), '--minify'],
+        cwd=PROJECT_DIR, check=True, capture_output=True, text=True)
+    return result.stdout
+
+
+def build(dist_dir=DIST_DIR):
+    """Write every bundle, fingerprinted and precompressed, plus manifest.json. Returns the manifest."""
+    tailwind = _tailwind_css()
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    os.makedirs(dist_dir)
+    manifest = {'bundles': {}, 'files': [], 'tailwind': tailwind is not None}
+    for name, sources in BUNDLES.items():
+        stem, ext = os.path.splitext(name)
+        minify = minify_css if ext == '.css' else minify_js
+        parts = []
+        for path in sources:
+            if path == TAILWIND:
+                if tailwind:
+                    parts.append(tailwind)
+                continue
+            with open(os.path.join(SOURCE_DIR, path), encoding='utf-8') as f:
+                parts.append(minify(f.read()))
+        data = '\n'.join(parts).encode('utf-8')
+        filename = f'{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}'
+        path = os.path.join(dist_dir, filename)
+        with open(path, 'wb') as f:
+            f.write(data)
+        # mtime=0 keeps the .gz byte-identical across builds
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+        manifest['bundles'][name] = filename
+        manifest['files'].append(filename)
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
@@ -0,0 +1,113 @@
+from datetime import datetime
+from sqlalchemy import or_, select, tuple_, update
+from sqlalchemy.orm import selectinload
+from app.extensions import db
+from app.models import Order, OrderItem
+from app.services import sales_rollup
+
+# Status changes and soft deletes for many orders in one transaction, for the
+# checkboxes on the orders page. The single-order links use it too, so every
+# admin change moves the sales rollups only for an UPDATE that matched.
+#
+# The client sends the updated_at it last saw for each order. An order that
+# has changed since (another tablet completed it, the live feed hasn't caught
+# up yet) is left alone and reported back as a conflict with its current row,
+# instead of being overwritten. The rows are read FOR UPDATE on Postgres, and
+# the UPDATE itself repeats the (id, updated_at) guard, so a change that
+# commits in between is never overwritten on either backend.
+
+MAX_ORDERS = 500
+STATUSES = ('Pending', 'Completed', 'Cancelled')
+ACTIONS = ('status', 'delete')
+
+
+def _parse_expected(expected):
+    parsed = {}
+    for order_id, value in (expected or {}).items():
+        try:
+            parsed[int(order_id)] = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid updated_at for order {order_id}')
+    return parsed
+
+
+def parse(payload):
+    """Validate a request body. Returns (ids, action, status, expected) or raises ValueError."""
+    if not isinstance(payload, dict):
+        raise ValueError('Expected a JSON object')
+    try:
+        ids = list(dict.fromkeys(int(i) for i in payload.get('ids') or ()))
+    except (TypeError, ValueError):
+        raise ValueError('ids must be a list of order ids')
+    if not ids:
+        raise ValueError('No orders selected')
+    if len(ids) > MAX_ORDERS:
+        raise ValueError(f'At most {MAX_ORDERS} orders at a time')
+    action = payload.get('action')
+    if action not in ACTIONS:
+        raise ValueError('Invalid action')
+    status = payload.get('status')
+    if action == 'status' and status not in STATUSES:
+        raise ValueError('Invalid status')
+    expected = payload.get('expected')
+    if expected is not None and not isinstance(expected, dict):
+        raise ValueError('expected must map order ids to updated_at')
+    return ids, action, status, _parse_expected(expected)
+
+
+def apply(ids, action, status=None, expected=None):
+    """Change the given live orders in one UPDATE and commit.
+
+    Returns (changed orders, conflicting orders, ids skipped because they are
+    missing, deleted or already in that status). Orders are returned with their
+    items loaded, ready to render.
+    """
+    expected = expected or {}
+    rows = db.session.execute(
+        select(Order.id, Order.status, Order.is_deleted, Order.created_at, Order.total_price, Order.updated_at)
+        .where(Order.id.in_(ids), Order.is_deleted == False)
+        .with_for_update()
+    ).all()
+
+    candidates, conflict_ids = [], []
+    for row in rows:
+        if row.id in expected and expected[row.id] != row.updated_at:
+            conflict_ids.append(row.id)
+        elif action == 'delete' or row.status != status:
+            candidates.append(row)
+
+    changed = set()
+    if candidates:
+        now = datetime.utcnow()
+        values = {'updated_at': now}
+        if action == 'delete':
+            values['is_deleted'] = True
+        else:
+            values['status'] = status
+        changed = set(db.session.execute(
+            update(Order)
+            .where(or_(
+                tuple_(Order.id, Order.updated_at).in_([(r.id, r.updated_at) for r in candidates if r.updated_at]),
+                Order.id.in_([r.id for r in candidates if not r.updated_at]) & Order.updated_at.is_(None),
+            ))
+            .values(**values)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+        conflict_ids += [r.id for r in candidates if r.id not in changed]
+        sales_rollup.record_orders_changed([
+            (r, status if action == 'status' else r.status, action == 'delete')
+            for r in candidates if r.id in changed
+        ])
+    db.session.commit()
+
+    touched = changed | set(conflict_ids)
+    skipped = [i for i in ids if i not in touched]
+    if not touched:
+        return [], [], skipped
+    orders = {o.id: o for o in Order.query.filter(Order.id.in_(touched)).options(
+        selectinload(Order.items).joinedload(OrderItem.menu_item)
+    )}
+    return ([orders[i] for i in ids if i in changed and i in orders],
+            [orders[i] for i in ids if i in conflict_ids and i in orders],
+            skipped)
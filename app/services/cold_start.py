@@ -0,0 +1,40 @@
+import os
+from jinja2 import FileSystemBytecodeCache
+
+# Everything create_app does is paid again on each serverless cold start, and
+# compiling the Jinja templates is the largest part of a first render. Compiled
+# templates are kept in TEMPLATE_CACHE_DIR instead. Jinja checks each entry
+# against the template's source, so stale entries are simply recompiled.
+# `python startup_profile.py compile-templates` fills the directory at build
+# time, so a read-only deployment starts with every template compiled.
+
+
+class TemplateCache(FileSystemBytecodeCache):
+    """Bytecode cache that keeps working, read-only, when its directory can't be written."""
+
+    def get_cache_key(self, name, filename=None):
+        # Key on the template name only: the absolute path differs between the
+        # build machine and the deployed bundle
+        return super().get_cache_key(name)
+
+    def dump_bytecode(self, bucket):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+def init_app(app):
+    cache_dir = app.config.get('TEMPLATE_CACHE_DIR')
+    if cache_dir:
+        app.jinja_env.bytecode_cache = TemplateCache(cache_dir)
+
+
+def compile_templates(app):
+    """Compile every template into the bytecode cache. Returns the number compiled."""
+    count = 0
+    for name in app.jinja_env.list_templates(filter_func=lambda n: n.endswith('.html')):
+        app.jinja_env.get_template(name)
+        count += 1
+    return count
@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, NullPool
+
+# Engine profiles, chosen with DB_PROFILE (or detected from the URL):
+#   sqlite     - local development, SQLAlchemy defaults
+#   serverless - Vercel against the Supabase transaction pooler (port 6543).
+#                pgbouncer multiplexes server connections, so each instance
+#                keeps a tiny pre-pinged pool (DB_POOL_SIZE=0 for NullPool)
+#                and never relies on server-side prepared statements.
+#   server     - long-running gunicorn workers with a sized QueuePool,
+#                pre-ping and recycling of stale connections.
+# Pools are instrumented so checkout wait times and connection counts can be
+# read from /admin/db-stats when sizing the pool.
+
+PROFILE_DEFAULTS = {
+    'serverless': {'pool_size': 1, 'max_overflow': 2, 'pool_timeout': 5, 'pool_recycle': 300},
+    'server': {'pool_size': 5, 'max_overflow': 10, 'pool_timeout': 10, 'pool_recycle': 1800},
+}
+
+
+class PoolStats:
+    def __init__(self, samples=1000):
+        self.lock = threading.Lock()
+        self.waits = deque(maxlen=samples)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self.lock:
+            self.waits.append(seconds)
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def snapshot(self):
+        with self.lock:
+            waits = sorted(self.waits)
+            stats = {
+                'checkouts': self.checkouts,
+                'checkout_timeouts': self.timeouts,
+                'connections_opened': self.connects,
+                'connections_invalidated': self.invalidations,
+            }
+        pick = lambda q: round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 3) if waits else 0
+        stats['checkout_wait_ms'] = {
+            'samples': len(waits),
+            'avg': round(sum(waits) / len(waits) * 1000, 3) if waits else 0,
+            'p50': pick(0.50),
+            'p95': pick(0.95),
+            'p99': pick(0.99),
+            'max': round(waits[-1] * 1000, 3) if waits else 0,
+        }
+        return stats
+
+
+stats = PoolStats()
+
+
+class _TimedPoolMixin:
+    """Measures how long callers wait to get a connection out of the pool."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except Exception:
+            stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        stats.record_wait(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedNullPool(_TimedPoolMixin, NullPool):
+    pass
+
+
+def _on_connect(dbapi_connection, connection_record):
+    with stats.lock:
+        stats.connects += 1
+
+
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    with stats.lock:
+        stats.invalidations += 1
+
+
+for _pool_class in (TimedQueuePool, TimedNullPool):
+    event.listen(_pool_class, 'connect', _on_connect)
+    event.listen(_pool_class, 'invalidate', _on_invalidate)
+
+
+def detect_profile(url):
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite':
+        return 'sqlite'
+    if url.port == 6543 or 'pgbouncer' in url.query:
+        return 'serverless'
+    return 'server'
+
+
+def engine_options(config):
+    """SQLAlchemy engine options for the configured profile."""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    profile = config.get('DB_PROFILE') or detect_profile(url)
+    if profile == 'sqlite':
+        return profile, {}
+    if profile not in PROFILE_DEFAULTS:
+        raise ValueError(f"Unknown DB_PROFILE {profile!r}")
+
+    settings = dict(PROFILE_DEFAULTS[profile])
+    for key, name in [('pool_size', 'DB_POOL_SIZE'), ('max_overflow', 'DB_MAX_OVERFLOW'),
+                      ('pool_timeout', 'DB_POOL_TIMEOUT'), ('pool_recycle', 'DB_POOL_RECYCLE')]:
+        if config.get(name) is not None:
+            settings[key] = config[name]
+
+    connect_args = {'connect_timeout': 5} if url.get_backend_name() == 'postgresql' else {}
+    if url.get_driver_name() == 'psycopg':
+        # psycopg 3 prepares repeated statements server-side, which breaks behind
+        # pgbouncer in transaction mode ("prepared statement already exists")
+        connect_args['prepare_threshold'] = None
+
+    if settings['pool_size'] == 0:
+        return profile, {'poolclass': TimedNullPool, 'connect_args': connect_args}
+    return profile, {
+        'poolclass': TimedQueuePool,
+        'pool_pre_ping': True,
+        'connect_args': connect_args,
+        **settings,
+    }
+
+
+def init_app(app):
+    profile, options = engine_options(app.config)
+    # Explicit SQLALCHEMY_ENGINE_OPTIONS still win over the profile
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    app.config['DB_PROFILE'] = profile
+
+
+def pool_status(engine):
+    pool = engine.pool
+    status = {'pool': type(pool).__name__, 'status': pool.status()}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_out=pool.checkedout(),
+                      overflow=pool.overflow(), idle=pool.checkedin())
+    if isinstance(pool, _TimedPoolMixin):
+        status.update(stats.snapshot())
+    return status
@@ -1,22 +1,151 @@
 import os
+import io
+import json
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.utils import secure_filename
 from flask import current_app
-import uuid
+from app.services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Uploads are stored under their content hash (<sha256>.<ext>), so the same
+# photo uploaded twice is stored once and any number of menu items can share
+# it; files are only removed when the last item referencing them lets go.
+#
+# Every upload is re-encoded into a few widths (thumbnail, card, full) as WebP
+# with a JPEG fallback, EXIF stripped. Encoding runs on a small thread pool
+# after the admin request commits, so add_item/edit_item return right away;
+# until the variants exist templates fall back to the original file.
+IMAGE_WIDTHS = (160, 480, 1080)
+# Spellings of the same format, so identical bytes always get one name and one set of variants
+EXTENSION_ALIASES = {'.jpeg': '.jpg', '.jpe': '.jpg', '.jfif': '.jpg', '.tif': '.tiff'}
+
+_executor = None
 
 def save_image(file):
     if not file:
         return None
-        
-    filename = secure_filename(file.filename)
-    # Give it a unique name to avoid collisions
-    unique_filename = f"{uuid.uuid4().hex}_{filename}"
-    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
-    file.save(file_path)
-    return unique_filename
+
+    data = file.read()
+    ext = os.path.splitext(secure_filename(file.filename))[1].lower()
+    ext = EXTENSION_ALIASES.get(ext, ext)
+    # Identical uploads map to the same name and are written only once
+    filename = f"{hashlib.sha256(data).hexdigest()[:32]}{ext}"
+    storage = get_storage()
+    if not storage.exists(filename):
+        storage.save(filename, data)
+    return filename
+
+def _variant_names(filename, width):
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}_{width}.webp", f"{stem}_{width}.jpg"
+
+def _encode(image, format, **options):
+    buf = io.BytesIO()
+    image.save(buf, format, **options)
+    return buf.getvalue()
+
+def build_variants(filename):
+    """Encode the resized WebP/JPEG variants of an uploaded image and return the variant set."""
+    # Imported here so public pages, which only need image_sources(), don't load Pillow
+    from PIL import Image, ImageOps
+    storage = get_storage()
+    with storage.open(filename) as f, Image.open(f) as original:
+        # Apply the EXIF orientation, then drop EXIF entirely by not passing it on save
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    variants = {'webp': {}, 'jpeg': {}}
+    for width in sorted({min(w, image.width) for w in IMAGE_WIDTHS}):
+        webp_name, jpeg_name = _variant_names(filename, width)
+        # Same content, same names: variants of a deduplicated upload already exist
+        if not (storage.exists(webp_name) and storage.exists(jpeg_name)):
+            resized = image if width == image.width else image.resize(
+                (width, round(image.height * width / image.width)), Image.LANCZOS)
+
+            webp = resized if resized.mode in ('RGB', 'RGBA') else resized.convert('RGBA')
+            storage.save(webp_name, _encode(webp, 'WEBP', quality=80, method=4))
+
+            if resized.mode in ('RGBA', 'LA', 'P'):
+                # JPEG has no alpha channel; flatten onto white
+                flat = Image.new('RGB', resized.size, (255, 255, 255))
+                rgba = resized.convert('RGBA')
+                flat.paste(rgba, mask=rgba.split()[-1])
+            else:
+                flat = resized.convert('RGB')
+            storage.save(jpeg_name, _encode(flat, 'JPEG', quality=82, optimize=True, progressive=True))
+
+        variants['webp'][width] = webp_name
+        variants['jpeg'][width] = jpeg_name
+    return variants
+
+def _process(app, filename):
+    from app.extensions import db
+    from app.models import MenuItem
+    from app.services import menu_cache, settings_cache
+    with app.app_context():
+        try:
+            variants = build_variants(filename)
+        except Exception:
+            logger.exception('Could not build image variants for %s', filename)
+            return
+        MenuItem.query.filter_by(image_path=filename).update(
+            {'image_variants': json.dumps(variants)}, synchronize_session=False)
+        # Cached menu pages still point at the original file
+        menu_cache.bump_version()
+        db.session.commit()
+        settings_cache.invalidate()
+
+def schedule_variants(filename):
+    """Build variants for an image already referenced by a committed MenuItem."""
+    global _executor
+    if not filename:
+        return
+    app = current_app._get_current_object()
+    workers = app.config['IMAGE_WORKERS']
+    if workers <= 0:
+        # Serverless: there is no process left to finish the work after the response
+        _process(app, filename)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image')
+    _executor.submit(_process, app, filename)
+
+def image_sources(image_path, variants=None):
+    """src/srcset values for a stored image, used by the responsive_image macro."""
+    if not image_path:
+        return None
+    url = get_storage().url
+    if isinstance(variants, str):
+        variants = json.loads(variants)
+    if not variants:
+        return {'src': url(image_path), 'webp': None, 'jpeg': None}
+
+    def srcset(names):
+        return ', '.join(f"{url(name)} {width}w" for width, name in sorted(names.items(), key=lambda kv: int(kv[0])))
+
+    largest = max(variants['jpeg'], key=int)
+    return {'src': url(variants['jpeg'][largest]), 'webp': srcset(variants['webp']), 'jpeg': srcset(variants['jpeg'])}
 
 def delete_image(filename):
+    """Remove an image and its variants once no menu item references it.
+
+    Call after the change that dropped the reference has been committed.
+    """
+    from app.models import MenuItem
     if not filename:
         return
-    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-    if os.path.exists(file_path):
-        os.remove(file_path)
+    if MenuItem.query.filter_by(image_path=filename).count():
+        return
+    storage = get_storage()
+    storage.delete(filename)
+    # Variants share the original's stem: <stem>_<width>.webp / .jpg. Uploads
+    # from before extensions were normalized can have the same stem under
+    # another extension (.jpeg next to .jpg) and serve the same variants.
+    stem = os.path.splitext(filename)[0]
+    if MenuItem.query.filter(MenuItem.image_path.startswith(f"{stem}.", autoescape=True)).count():
+        return
+    for name in storage.list(f"{stem}_"):
+        storage.delete(name)
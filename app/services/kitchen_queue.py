@@ -0,0 +1,225 @@
+import threading
+import time
+import uuid
+from datetime import datetime
+from flask import current_app
+from app.extensions import db
+from app.models import MenuItem, Order, OrderItem
+from app.services import menu_cache
+from app.services.order_feed import OVERLAP
+
+# What the kitchen still has to make: quantities per dish over all live
+# Pending orders, and the Pending pre-bookings grouped by arrival time.
+#
+# Each worker keeps the Pending orders in memory, loaded from the database on
+# first use, and adjusts the totals as orders come and go:
+# - create_order and the admin status/delete routes call track() right after
+#   they commit, so changes made on this worker show up immediately;
+# - at most once every KITCHEN_SYNC_INTERVAL seconds, a request to the kitchen
+#   view reads the orders whose updated_at moved since the last sync (the
+#   ix_orders_updated_at range the order feed uses), which picks up changes
+#   made by other workers.
+# Applying an order twice is harmless, it is keyed by id. Every change bumps
+# a version, so screens polling the view get a 304 until something changes.
+
+ARRIVAL_FORMATS = ('%I:%M %p', '%H:%M', '%I:%M%p', '%I %p')
+
+
+def _arrival_key(value):
+    # Free text from the checkout form; known time formats sort by time, the rest after them
+    for fmt in ARRIVAL_FORMATS:
+        try:
+            return 0, datetime.strptime(value.strip().upper(), fmt).time().isoformat(), value
+        except (AttributeError, ValueError):
+            continue
+    return 1, '', value or ''
+
+
+class KitchenQueue:
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.orders = {}  # order id -> entry, Pending and not deleted
+        self.totals = {}  # menu item id -> [quantity, number of orders]
+        self.names = {}
+        self.names_version = None
+        self.cursor = None
+        self.synced_at = 0
+        # Versions only mean something on this worker; the token keeps ETags from clashing across workers
+        self.token = uuid.uuid4().hex[:8]
+        self.version = 0
+        self.snapshot = None
+
+    # Totals
+
+    def _add(self, entry):
+        self.orders[entry['id']] = entry
+        for menu_item_id, quantity in entry['items'].items():
+            total = self.totals.setdefault(menu_item_id, [0, 0])
+            total[0] += quantity
+            total[1] += 1
+
+    def _remove(self, order_id):
+        entry = self.orders.pop(order_id)
+        for menu_item_id, quantity in entry['items'].items():
+            total = self.totals[menu_item_id]
+            total[0] -= quantity
+            total[1] -= 1
+            if total[1] <= 0:
+                del self.totals[menu_item_id]
+
+    def _apply(self, row, items):
+        """Bring one order in line with its current state. Returns True if anything changed."""
+        pending = row.status == 'Pending' and not row.is_deleted
+        if pending == (row.id in self.orders):
+            return False
+        if pending:
+            quantities = {}
+            for menu_item_id, quantity in items or ():
+                quantities[menu_item_id] = quantities.get(menu_item_id, 0) + (quantity or 0)
+            self._add({'id': row.id, 'name': row.customer_name, 'type': row.order_type,
+                       'arrival': row.estimated_arrival_time, 'items': quantities})
+        else:
+            self._remove(row.id)
+        return True
+
+    def _changed(self):
+        self.version += 1
+        self.snapshot = None
+
+    # Loading and syncing
+
+    def _pending_items(self, order_ids):
+        items = {}
+        if order_ids:
+            for order_id, menu_item_id, quantity in db.session.query(
+                OrderItem.order_id, OrderItem.menu_item_id, OrderItem.quantity
+            ).filter(OrderItem.order_id.in_(order_ids)):
+                items.setdefault(order_id, []).append((menu_item_id, quantity))
+        return items
+
+    def _columns(self):
+        return db.session.query(Order.id, Order.status, Order.is_deleted, Order.order_type,
+                                Order.estimated_arrival_time, Order.customer_name, Order.updated_at)
+
+    def _load(self):
+        cursor = datetime.utcnow()
+        rows = self._columns().filter(Order.status == 'Pending', Order.is_deleted == False).all()
+        items = self._pending_items([r.id for r in rows])
+        self.orders, self.totals = {}, {}
+        for row in rows:
+            self._apply(row, items.get(row.id))
+        self.cursor = cursor
+        self.synced_at = time.monotonic()
+        self.loaded = True
+        self._changed()
+
+    def _sync(self):
+        # updated_at comes from the app servers' clocks, like this cursor
+        cursor = datetime.utcnow()
+        rows = self._columns().filter(Order.updated_at >= self.cursor - OVERLAP).all()
+        entering = [r.id for r in rows if r.status == 'Pending' and not r.is_deleted and r.id not in self.orders]
+        items = self._pending_items(entering)
+        changed = False
+        for row in rows:
+            changed = self._apply(row, items.get(row.id)) or changed
+        self.cursor = cursor
+        self.synced_at = time.monotonic()
+        if changed:
+            self._changed()
+
+    def _load_names(self):
+        version = menu_cache.current_version()
+        missing = [i for i in self.totals if i not in self.names]
+        if version != self.names_version:
+            self.names = dict(db.session.query(MenuItem.id, MenuItem.name).all())
+            self.names_version = version
+            self._changed()
+        elif missing:
+            # Items deleted from the menu stay None, so they are only looked up once
+            self.names.update(dict.fromkeys(missing))
+            self.names.update(db.session.query(MenuItem.id, MenuItem.name).filter(MenuItem.id.in_(missing)).all())
+            self._changed()
+
+    def stale(self):
+        """Whether the next refresh() will query the database."""
+        return not self.loaded or time.monotonic() - self.synced_at >= self.app.config['KITCHEN_SYNC_INTERVAL']
+
+    def refresh(self):
+        """Load on first use, then catch up with other workers once per sync interval."""
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            elif self.stale():
+                self._sync()
+            self._load_names()
+
+    def track(self, order, items=None):
+        """Apply an order this worker just committed. items: (menu_item_id, quantity) pairs, else order.items."""
+        with self.lock:
+            if not self.loaded:
+                return  # the first refresh reads it from the database
+            if order.status == 'Pending' and not order.is_deleted and items is None:
+                items = [(i.menu_item_id, i.quantity) for i in order.items]
+            if self._apply(order, items):
+                self._changed()
+
+    # Reading
+
+    def pending_count(self):
+        """Live Pending orders as of the last refresh, 0 before the first. Never blocks."""
+        return len(self.orders)
+
+    def _build_snapshot(self):
+        def name(menu_item_id):
+            return self.names.get(menu_item_id) or f'Item #{menu_item_id}'
+
+        dishes = sorted(({'menu_item_id': i, 'name': name(i), 'quantity': q, 'orders': n}
+                         for i, (q, n) in self.totals.items()), key=lambda d: (-d['quantity'], d['name']))
+        slots = {}
+        for entry in self.orders.values():
+            if entry['type'] == 'Pre-book':
+                slots.setdefault(entry['arrival'] or '', []).append(entry)
+        timeline = []
+        for arrival in sorted(slots, key=_arrival_key):
+            entries = sorted(slots[arrival], key=lambda e: e['id'])
+            quantities = {}
+            for entry in entries:
+                for menu_item_id, quantity in entry['items'].items():
+                    quantities[menu_item_id] = quantities.get(menu_item_id, 0) + quantity
+            timeline.append({
+                'arrival': arrival or None,
+                'orders': [{'order_id': e['id'], 'customer_name': e['name'],
+                            'items': [{'name': name(i), 'quantity': q} for i, q in e['items'].items()]}
+                           for e in entries],
+                'items': sorted(({'name': name(i), 'quantity': q} for i, q in quantities.items()),
+                                key=lambda d: (-d['quantity'], d['name'])),
+            })
+        return {
+            'version': f'{self.token}-{self.version}',
+            'pending_orders': len(self.orders),
+            'at_stall_orders': sum(1 for e in self.orders.values() if e['type'] != 'Pre-book'),
+            'dishes': dishes,
+            'timeline': timeline,
+        }
+
+    def current(self):
+        """The queue as a JSON-ready dict, rebuilt only after a change."""
+        with self.lock:
+            if self.snapshot is None:
+                self.snapshot = self._build_snapshot()
+            return self.snapshot
+
+
+def init_app(app):
+    app.extensions['kitchen_queue'] = KitchenQueue(app)
+
+
+def get_queue():
+    return current_app.extensions['kitchen_queue']
+
+
+def track(order, items=None):
+    """Call after committing a new order or a status/delete change."""
+    get_queue().track(order, items)
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from flask import current_app, request, session
+from app.extensions import db
+from app.models import Setting, Category, MenuItem
+from app.services.settings_cache import get_settings
+from app.services import assets
+from app.services.shared_cache import share
+
+# The public menu changes a few times a day, so rendered pages are cached per
+# worker and keyed by a menu version. The version lives in the settings table
+# ('menu_version'), which every worker already reads through the settings
+# cache, so an admin change made on one worker reaches the others within
+# SETTINGS_CACHE_TTL without any extra query. The same key doubles as a strong
+# ETag, letting browsers and CDN edges revalidate with If-None-Match and get a
+# 304 without touching the database or the template engine.
+#
+# The /api/menu payload is serialized once per version as well, with one
+# pre-encoded JSON fragment per item so delta responses (?since=<version>)
+# are assembled by string joins rather than re-serializing. create_order
+# prices orders from the same snapshot.
+
+_lock = threading.Lock()
+
+
+def bump_version():
+    """Mark the menu as changed. Call inside the admin transaction, before commit."""
+    version = str(time.time_ns() // 1_000_000)
+    setting = Setting.query.filter_by(key='menu_version').first()
+    if setting:
+        setting.value = version
+    else:
+        db.session.add(Setting(key='menu_version', value=version))
+    return version
+
+
+def current_version(settings=None):
+    settings = settings if settings is not None else get_settings()
+    return settings.get('menu_version') or '0'
+
+
+def _state():
+    return current_app.extensions.setdefault('menu_cache', {'pages': OrderedDict(), 'stamp': None, 'data': None})
+
+
+def _template_stamp():
+    # Templates and asset bundles only change on deploy; fold them into the key
+    # so a new release never answers 304 for a page rendered by the old
+    # templates, or one pointing at asset files the build has replaced.
+    state = _state()
+    if state['stamp'] is None:
+        folder = os.path.join(current_app.root_path, current_app.template_folder)
+        mtimes = [os.path.getmtime(os.path.join(root, f))
+                  for root, _, files in os.walk(folder) for f in files]
+        state['stamp'] = f"{int(max(mtimes, default=0))}-{assets.version()}"
+    return state['stamp']
+
+
+def _etag(settings, *key):
+    digest = hashlib.sha1()
+    digest.update(_template_stamp().encode())
+    for k, v in sorted(settings.items()):
+        digest.update(f'{k}={v}\0'.encode())
+    digest.update(repr(key).encode())
+    return digest.hexdigest()
+
+
+def cached_page(render, *key):
+    """Return a response for the page identified by key, rendering it only on a cache miss.
+
+    render is called with the settings snapshot and must return the page body.
+    """
+    settings = get_settings()
+
+    # Pages carrying flash messages are personal; never share or cache them.
+    # Without a session cookie there can't be any, and the session stays untouched.
+    if request.cookies.get(current_app.config['SESSION_COOKIE_NAME']) and session.get('_flashes'):
+        return current_app.make_response(render(settings))
+
+    etag = _etag(settings, *key)
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        pages = _state()['pages']
+        with _lock:
+            body = pages.get(etag)
+            if body is not None:
+                pages.move_to_end(etag)
+        if body is None:
+            body = render(settings)
+            with _lock:
+                pages[etag] = body
+                while len(pages) > current_app.config['MENU_CACHE_SIZE']:
+                    pages.popitem(last=False)
+        response = current_app.make_response(body)
+
+    response.set_etag(etag)
+    # Let clients and CDN edges store the page but revalidate it on every use
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return share(response)
+
+
+def _ms(value):
+    return int(value.replace(tzinfo=timezone.utc).timestamp() * 1000) if value else 0
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+def menu_data(max_age=None):
+    """Return the serialized menu for the current version, building it once per version."""
+    settings = get_settings(max_age)
+    version = current_version(settings)
+    state = _state()
+    data = state['data']
+    if data is not None and data['version'] == version:
+        return data
+
+    with _lock:
+        data = state['data']
+        if data is not None and data['version'] == version:
+            return data
+        categories = Category.query.order_by(Category.id).all()
+        items = MenuItem.query.filter_by(is_available=True).order_by(MenuItem.id).all()
+        data = {
+            'version': version,
+            'header': _dumps({
+                'version': version,
+                'shop_open': settings.get('shop_status') == 'open',
+                'categories': [{'id': c.id, 'name': c.name} for c in categories],
+                'ids': [item.id for item in items]
+            })[:-1],
+            'items': [(_ms(item.updated_at or item.created_at), _dumps(item.to_dict())) for item in items],
+            'prices': {item.id: item.price for item in items}
+        }
+        data['body'] = f'{data["header"]},"items":[{",".join(f for _, f in data["items"])}]}}'.encode()
+        state['data'] = data
+        return data
+
+
+def api_response(since=None):
+    """JSON menu for the cart front-end, either in full or only the items changed after `since`."""
+    version = current_version()
+    if since is not None and not since.isdigit():
+        since = None
+
+    response = current_app.response_class(mimetype='application/json')
+    response.set_etag(f'menu-{version}' + (f'-{since}' if since else ''))
+    # '0' means the menu has never been edited; 1970 would be a made-up date
+    if version != '0':
+        response.last_modified = datetime.fromtimestamp(int(version) / 1000, tz=timezone.utc)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    share(response)
+    if request.if_none_match.contains(response.get_etag()[0]):
+        response.status_code = 304
+        return response
+
+    data = menu_data()
+    if since:
+        changed = ','.join(f for updated, f in data['items'] if updated > int(since))
+        response.set_data(f'{data["header"]},"since":"{since}","items":[{changed}]}}')
+    else:
+        response.set_data(data['body'])
+    return response.make_conditional(request)
@@ -0,0 +1,159 @@
+import hashlib
+import re
+from flask import current_app, request, jsonify
+from sqlalchemy import and_, bindparam, func, inspect, literal_column, or_, table, column, text
+from app.extensions import db
+from app.models import Category, MenuItem
+from app.services import menu_cache
+from app.services.shared_cache import share
+
+# Server-side menu search, so the menu page can be paginated instead of
+# shipping every item to filter in the browser. Matching is over name and
+# description, every word as a prefix ("chi tik" finds "Chicken Tikka"), with
+# category and veg/non-veg filters on top.
+#
+# Backends, picked once per worker:
+#   fts5     - SQLite with the menu_items_fts table from migration 10. It is an
+#              external-content FTS5 index kept in sync by triggers, ranked by
+#              bm25 with name matches weighted above description matches.
+#   postgres - to_tsvector/to_tsquery prefix matching plus a pg_trgm LIKE for
+#              substrings, both served by the GIN indexes from migration 10.
+#   like     - anything else (or SQLite without FTS5): LIKE per word.
+
+MAX_WORDS = 8
+
+FTS_TABLE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS menu_items_fts USING fts5("
+    "name, description, content='menu_items', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+FTS_TRIGGERS_DDL = (
+    "CREATE TRIGGER IF NOT EXISTS menu_items_fts_insert AFTER INSERT ON menu_items BEGIN "
+    "INSERT INTO menu_items_fts (rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS menu_items_fts_delete AFTER DELETE ON menu_items BEGIN "
+    "INSERT INTO menu_items_fts (menu_items_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS menu_items_fts_update AFTER UPDATE OF name, description ON menu_items BEGIN "
+    "INSERT INTO menu_items_fts (menu_items_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO menu_items_fts (rowid, name, description) VALUES (new.id, new.name, new.description); END",
+)
+
+# Postgres only uses an expression index when the query repeats the expression
+# exactly, so the migration and the queries below share these
+PG_DOCUMENT = "lower(coalesce(name, '') || ' ' || coalesce(description, ''))"
+PG_TSVECTOR = "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))"
+
+_fts = table('menu_items_fts', column('rowid'))
+
+
+def backend():
+    state = current_app.extensions.setdefault('menu_search', {})
+    if 'backend' not in state:
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            state['backend'] = 'postgres'
+        elif dialect == 'sqlite' and inspect(db.engine).has_table('menu_items_fts'):
+            state['backend'] = 'fts5'
+        else:
+            state['backend'] = 'like'
+    return state['backend']
+
+
+def _words(q):
+    return re.findall(r'\w+', (q or '').lower())[:MAX_WORDS]
+
+
+def _match(query, q):
+    """Restrict query to items matching q. Returns (query, ranking order_by clauses)."""
+    words = _words(q)
+    if not words:
+        return query, []
+    kind = backend()
+    if kind == 'fts5':
+        match = ' '.join(f'"{w}"*' for w in words)
+        query = query.join(_fts, _fts.c.rowid == MenuItem.id) \
+            .filter(text('menu_items_fts MATCH :match').bindparams(match=match))
+        return query, [text('bm25(menu_items_fts, 10.0, 1.0)')]
+    if kind == 'postgres':
+        tsquery = func.to_tsquery(literal_column("'simple'"), bindparam('tsquery', ' & '.join(f'{w}:*' for w in words)))
+        tsvector = literal_column(PG_TSVECTOR)
+        pattern = '%' + '%'.join(w.replace('_', '\\_') for w in words) + '%'
+        query = query.filter(or_(tsvector.op('@@')(tsquery), literal_column(PG_DOCUMENT).like(pattern)))
+        return query, [func.ts_rank(tsvector, tsquery).desc()]
+    query = query.filter(and_(*[
+        or_(MenuItem.name.ilike(f'%{w}%', escape='\\'), MenuItem.description.ilike(f'%{w}%', escape='\\'))
+        for w in (w.replace('_', '\\_') for w in words)
+    ]))
+    return query, [MenuItem.name]
+
+
+def _filters(category=None, veg=None):
+    conditions = [MenuItem.is_available == True]
+    if category is not None:
+        conditions.append(MenuItem.category_id == category)
+    if veg is not None:
+        conditions.append(MenuItem.is_non_veg == (not veg))
+    return conditions
+
+
+def parse_filters(args):
+    """Search filters from a query string: q, category (id), veg ('1' veg only, '0' non-veg only), page."""
+    return {
+        'q': (args.get('q') or '').strip()[:100],
+        'category': args.get('category', type=int),
+        'veg': {'1': True, '0': False}.get(args.get('veg')),
+        'page': max(args.get('page', 1, type=int), 1),
+    }
+
+
+def query_args(filters, **overrides):
+    """The filters as url_for() arguments, leaving out the empty ones."""
+    args = {'q': filters['q'] or None, 'category': filters['category'],
+            'veg': None if filters['veg'] is None else int(filters['veg'])}
+    args.update(overrides)
+    return {k: v for k, v in args.items() if v is not None}
+
+
+def search(q='', category=None, veg=None, page=1, per_page=None):
+    """One page of available items. Returns (items, next page number or None)."""
+    per_page = per_page or current_app.config['MENU_PAGE_SIZE']
+    query, ranking = _match(MenuItem.query, q)
+    items = query.filter(*_filters(category, veg)).order_by(*ranking, MenuItem.id) \
+        .offset((page - 1) * per_page).limit(per_page + 1).all()
+    return items[:per_page], (page + 1 if len(items) > per_page else None)
+
+
+def facets(q='', category=None, veg=None):
+    """Match counts per category and per veg/non-veg. Each facet ignores its own filter."""
+    query, _ = _match(db.session.query(MenuItem.category_id, func.count(MenuItem.id)).select_from(MenuItem), q)
+    by_category = dict(query.filter(*_filters(veg=veg)).group_by(MenuItem.category_id).all())
+    query, _ = _match(db.session.query(MenuItem.is_non_veg, func.count(MenuItem.id)).select_from(MenuItem), q)
+    by_type = dict(query.filter(*_filters(category=category)).group_by(MenuItem.is_non_veg).all())
+    return {
+        'categories': [{'id': c.id, 'name': c.name, 'count': by_category.get(c.id, 0)}
+                       for c in Category.query.order_by(Category.id)],
+        'veg': {'veg': by_type.get(False, 0) + by_type.get(None, 0), 'non_veg': by_type.get(True, 0)},
+    }
+
+
+def api_response():
+    """JSON search results with facets; revalidated against the menu version like /api/menu."""
+    filters = parse_filters(request.args)
+    etag = 'search-{}-{}'.format(menu_cache.current_version(),
+                                 hashlib.sha1(request.query_string).hexdigest()[:16])
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        items, next_page = search(**filters)
+        response = jsonify({
+            'query': filters['q'],
+            'page': filters['page'],
+            'next_page': next_page,
+            'items': [item.to_dict() for item in items],
+            'facets': facets(filters['q'], filters['category'], filters['veg']),
+        })
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return share(response)
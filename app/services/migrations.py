@@ -0,0 +1,213 @@
+import logging
+from datetime import datetime
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+# Versioned schema migrations for SQLite and Postgres. Applied versions are
+# recorded in schema_migrations; `python migrate.py` applies the pending ones
+# in order, each in its own transaction. Every step checks before it changes
+# anything, so databases set up by db.create_all() or by the old one-off
+# migrate_*.py scripts upgrade cleanly from wherever they are.
+#
+# Add new steps at the end with the next version number; never edit or
+# renumber a step that has shipped. Indexes created here are also declared on
+# the models so db.create_all() builds the same schema.
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+
+def _columns(conn, table):
+    return {c['name'] for c in inspect(conn).get_columns(table)}
+
+
+def add_column(conn, table, column, ddl, backfill=None):
+    if column in _columns(conn, table):
+        return
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    if backfill:
+        conn.execute(text(backfill))
+
+
+def create_index(conn, name, table, columns, unique=False, where=None):
+    """CREATE INDEX IF NOT EXISTS; `where` makes it a partial index (same syntax on both backends)."""
+    sql = f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    if where:
+        sql += f" WHERE {where}"
+    conn.execute(text(sql))
+
+
+def create_tables(conn, *models):
+    for model in models:
+        model.__table__.create(conn, checkfirst=True)
+
+
+def not_deleted(conn):
+    # Must match the literal SQLAlchemy renders for `Order.is_deleted == False`,
+    # otherwise the planner can't prove the partial index covers the query
+    return 'is_deleted = 0' if conn.dialect.name == 'sqlite' else 'is_deleted = false'
+
+
+@migration(1, 'Initial schema')
+def _initial_schema(conn):
+    from app.models import User, Category, MenuItem, PageView, Setting, Order, OrderItem
+    create_tables(conn, User, Category, MenuItem, PageView, Setting, Order, OrderItem)
+
+
+@migration(2, 'orders.is_deleted')
+def _orders_is_deleted(conn):
+    add_column(conn, 'orders', 'is_deleted', 'BOOLEAN DEFAULT false')
+    conn.execute(text("UPDATE orders SET is_deleted = false WHERE is_deleted IS NULL"))
+
+
+@migration(3, 'menu_items.updated_at')
+def _menu_items_updated_at(conn):
+    add_column(conn, 'menu_items', 'updated_at', 'TIMESTAMP',
+               backfill="UPDATE menu_items SET updated_at = created_at")
+
+
+@migration(4, 'orders.idempotency_key')
+def _orders_idempotency_key(conn):
+    # SQLite can't add a UNIQUE column, so the constraint is a separate index
+    add_column(conn, 'orders', 'idempotency_key', 'VARCHAR(64)')
+    if not any(set(c['column_names']) == {'idempotency_key'}
+               for c in inspect(conn).get_unique_constraints('orders')):
+        create_index(conn, 'ix_orders_idempotency_key', 'orders', ['idempotency_key'], unique=True)
+
+
+@migration(5, 'menu_items.image_variants')
+def _menu_items_image_variants(conn):
+    add_column(conn, 'menu_items', 'image_variants', 'TEXT')
+
+
+@migration(6, 'orders.updated_at')
+def _orders_updated_at(conn):
+    add_column(conn, 'orders', 'updated_at', 'TIMESTAMP',
+               backfill="UPDATE orders SET updated_at = created_at")
+
+
+@migration(7, 'Sales rollup tables')
+def _sales_rollups(conn):
+    from app.models import DailySales, DailyItemSales
+    create_tables(conn, DailySales, DailyItemSales)
+
+
+@migration(8, 'Hot-path indexes')
+def _hot_path_indexes(conn):
+    live = not_deleted(conn)
+    # Orders page (newest first, keyset on created_at/id) and the dashboard's recent orders
+    create_index(conn, 'ix_orders_live_created_at', 'orders', ['created_at', 'id'], where=live)
+    # Orders page status and type filters
+    create_index(conn, 'ix_orders_live_status_created_at', 'orders', ['status', 'created_at', 'id'], where=live)
+    create_index(conn, 'ix_orders_live_type_created_at', 'orders', ['order_type', 'created_at', 'id'], where=live)
+    # Live order feed polls by updated_at, deleted orders included
+    create_index(conn, 'ix_orders_updated_at', 'orders', ['updated_at'])
+    # Loading an order's items, and item lookups from the menu side
+    create_index(conn, 'ix_order_items_order_id', 'order_items', ['order_id'])
+    create_index(conn, 'ix_order_items_menu_item_id', 'order_items', ['menu_item_id'])
+    # Public menu filtered by category
+    create_index(conn, 'ix_menu_items_category_available', 'menu_items', ['category_id', 'is_available'])
+
+
+@migration(9, 'Order archive tables')
+def _order_archive(conn):
+    from app.models import ArchivedOrder, ArchivedOrderItem
+    create_tables(conn, ArchivedOrder, ArchivedOrderItem)
+
+
+@migration(10, 'Menu search index')
+def _menu_search_index(conn):
+    from app.services import menu_search
+    if conn.dialect.name == 'sqlite':
+        # Builds without FTS5 fall back to LIKE matching (see menu_search.backend)
+        try:
+            with conn.begin_nested():
+                conn.execute(text(menu_search.FTS_TABLE_DDL))
+        except Exception:
+            logger.warning('SQLite has no FTS5; menu search will use LIKE')
+            return
+        for ddl in menu_search.FTS_TRIGGERS_DDL:
+            conn.execute(text(ddl))
+        conn.execute(text("INSERT INTO menu_items_fts (menu_items_fts) VALUES ('rebuild')"))
+    elif conn.dialect.name == 'postgresql':
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        # Word prefixes through the tsvector, substrings through trigrams
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_menu_items_search_tsv ON menu_items "
+                          f"USING gin (({menu_search.PG_TSVECTOR}))"))
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_menu_items_search_trgm ON menu_items "
+                          f"USING gin (({menu_search.PG_DOCUMENT}) gin_trgm_ops)"))
+
+
+@migration(11, 'Never reuse order ids')
+def _orders_autoincrement(conn):
+    # Archived orders keep their ids, so a new order must never get one again:
+    # the next archive run would collide with it, and old /order-success links
+    # would show the new order. A plain SQLite INTEGER PRIMARY KEY hands out
+    # max(id) + 1, which reuses the ids of archived orders; AUTOINCREMENT needs
+    # the table rebuilt. Postgres sequences never go back, they only need to be
+    # past ids archived from before a restore or manual insert.
+    from sqlalchemy import MetaData
+    from sqlalchemy.schema import CreateTable
+    from app.models import Order
+    if conn.dialect.name == 'sqlite':
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'orders'")).scalar()
+        if 'AUTOINCREMENT' not in ddl.upper():
+            # The documented rebuild: new table, copy, drop, rename. Foreign key
+            # enforcement is off for these connections, and order_items refers
+            # to orders by name, so it points at the new table afterwards.
+            columns = ', '.join(c.name for c in Order.__table__.columns)
+            rebuilt = Order.__table__.to_metadata(MetaData(), name='orders_rebuilt')
+            conn.execute(CreateTable(rebuilt))
+            conn.execute(text(f"INSERT INTO orders_rebuilt ({columns}) SELECT {columns} FROM orders"))
+            conn.execute(text("DROP TABLE orders"))
+            conn.execute(text("ALTER TABLE orders_rebuilt RENAME TO orders"))
+            for index in Order.__table__.indexes:
+                index.create(conn, checkfirst=True)
+        top = max(conn.execute(text("SELECT max(id) FROM orders")).scalar() or 0,
+                  conn.execute(text("SELECT max(id) FROM orders_archive")).scalar() or 0)
+        conn.execute(text("DELETE FROM sqlite_sequence WHERE name IN ('orders', 'orders_rebuilt')"))
+        conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('orders', :top)"), {'top': top})
+    elif conn.dialect.name == 'postgresql':
+        sequence = conn.execute(text("SELECT pg_get_serial_sequence('orders', 'id')")).scalar()
+        archived = conn.execute(text("SELECT max(id) FROM orders_archive")).scalar()
+        if sequence and archived and archived > conn.execute(text(f"SELECT last_value FROM {sequence}")).scalar():
+            conn.execute(text("SELECT setval(:sequence, :top)"), {'sequence': sequence, 'top': archived})
+
+
+def _ensure_version_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, description VARCHAR(200), applied_at TIMESTAMP)"))
+
+
+def applied_versions(engine):
+    _ensure_version_table(engine)
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def pending(engine):
+    done = applied_versions(engine)
+    return [m for m in sorted(MIGRATIONS, key=lambda m: m[0]) if m[0] not in done]
+
+
+def upgrade(engine):
+    """Apply pending migrations in order. Returns the (version, description) pairs applied."""
+    applied = []
+    for version, description, fn in pending(engine):
+        logger.info('Applying migration %s: %s', version, description)
+        with engine.begin() as conn:
+            fn(conn)
+            conn.execute(text("INSERT INTO schema_migrations (version, description, applied_at) "
+                              "VALUES (:version, :description, :applied_at)"),
+                         {'version': version, 'description': description, 'applied_at': datetime.utcnow()})
+        applied.append((version, description))
+    return applied
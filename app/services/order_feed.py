@@ -0,0 +1,160 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from flask import current_app, render_template
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+from app.extensions import db
+from app.models import Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+# Live feed of new orders and status changes for the admin orders page.
+# One poller thread per worker reads orders whose updated_at moved since the
+# last poll, renders each changed row once and fans the event out to every
+# connected tablet (SSE stream or long-poll), so the number of open admin
+# screens does not change the number of DB queries. The poller only runs
+# while someone is listening, plus a short grace period between reconnects.
+#
+# Event cursors are updated_at timestamps, which mean the same thing on every
+# worker, so a client reconnecting to another worker resumes where it was.
+
+# Rows are re-read for this long after the cursor, because updated_at is set
+# before commit and a slow transaction can become visible after newer ones.
+OVERLAP = timedelta(seconds=5)
+IDLE_GRACE = 30
+
+
+class OrderFeed:
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.thread = None
+        self.idle_since = None
+        self.recent = deque(maxlen=500)
+        self._reset()
+
+    def _reset(self):
+        self.cursor = None
+        self.covered_from = None # Events after this cursor are all in self.recent
+        self.seen = {}
+        self.recent.clear()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=256)
+        with self.lock:
+            self.subscribers.add(q)
+            self.idle_since = None
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='order-feed', daemon=True)
+                self.thread.start()
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self.subscribers.discard(q)
+            if not self.subscribers:
+                self.idle_since = time.monotonic()
+
+    def _run(self):
+        interval = self.app.config['ORDER_FEED_POLL_INTERVAL']
+        with self.app.app_context():
+            while True:
+                with self.lock:
+                    if self.idle_since is not None and time.monotonic() - self.idle_since > IDLE_GRACE:
+                        self.thread = None
+                        self._reset()
+                        return
+                try:
+                    self._poll()
+                except Exception:
+                    logger.exception('Order feed poll failed')
+                    db.session.rollback()
+                finally:
+                    # Hand the connection back to the pool between polls
+                    db.session.remove()
+                time.sleep(interval)
+
+    def _poll(self):
+        if self.cursor is None:
+            start = db.session.query(func.max(Order.updated_at)).scalar() or datetime.utcnow()
+            # Rows already in the first overlap window are history, not news
+            recent = db.session.query(Order.id, Order.updated_at).filter(Order.updated_at >= start - OVERLAP).all()
+            with self.lock:
+                self.cursor = self.covered_from = start
+                self.seen = dict(recent)
+            return
+
+        window_start = self.cursor - OVERLAP
+        changed = self._query().filter(Order.updated_at >= window_start).order_by(Order.updated_at, Order.id).all()
+        events = []
+        for order in changed:
+            if self.seen.get(order.id) == order.updated_at:
+                continue
+            self.seen[order.id] = order.updated_at
+            events.append(self._event(order))
+
+        with self.lock:
+            self.seen = {k: v for k, v in self.seen.items() if v >= window_start}
+            for event in events:
+                if len(self.recent) == self.recent.maxlen:
+                    self.covered_from = self.recent[0]['cursor_at']
+                self.recent.append(event)
+                self.cursor = max(self.cursor, event['cursor_at'])
+            subscribers = list(self.subscribers)
+
+        for q in subscribers:
+            for event in events:
+                try:
+                    q.put_nowait(event)
+                except queue.Full:
+                    # A stalled client; it will catch up from its cursor on reconnect
+                    break
+
+    def _query(self):
+        return Order.query.options(selectinload(Order.items).joinedload(OrderItem.menu_item))
+
+    def _event(self, order):
+        with self.app.test_request_context('/admin/orders'):
+            html = render_template('admin/_order_row.html', order=order)
+        return {
+            'order_id': order.id,
+            'status': order.status,
+            'order_type': order.order_type,
+            'is_deleted': bool(order.is_deleted),
+            'cursor': order.updated_at.isoformat(),
+            'cursor_at': order.updated_at,
+            'html': html,
+        }
+
+    def changes_since(self, since):
+        """Events for orders changed after `since`, from memory when the poller has them."""
+        with self.lock:
+            if self.covered_from is not None and since >= self.covered_from:
+                return [e for e in self.recent if e['cursor_at'] > since]
+        orders = self._query().filter(Order.updated_at > since).order_by(Order.updated_at, Order.id).limit(500).all()
+        return [self._event(order) for order in orders]
+
+
+def init_app(app):
+    app.extensions['order_feed'] = OrderFeed(app)
+
+
+def get_feed():
+    return current_app.extensions['order_feed']
+
+
+def public_event(event):
+    return {k: v for k, v in event.items() if k != 'cursor_at'}
+
+
+def parse_cursor(value):
+    """Cursor sent by a client, or None if missing or malformed."""
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
@@ -0,0 +1,171 @@
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from flask import current_app
+from app.services import kitchen_queue
+
+# Admission control for create_order. Every order is a multi-statement
+# transaction holding a pooled connection, so during a rush unlimited intake
+# starves the menu and the admin pages of connections. Three limits, each
+# checked in memory before the order touches the database:
+#
+#   ORDER_MAX_IN_FLIGHT    order transactions running at once in this worker;
+#                          the rest get 503 and retry a moment later
+#   ORDER_MAX_PENDING      live Pending orders; while the kitchen is this far
+#                          behind, new orders get 503. The count comes from the
+#                          kitchen queue (services/kitchen_queue.py); one order
+#                          per KITCHEN_SYNC_INTERVAL refreshes it, the others
+#                          are answered from the last count.
+#   ORDER_PHONE_LIMIT      orders per phone number per ORDER_PHONE_WINDOW
+#                          seconds, answered with 429
+#
+# 0 turns a limit off. All state is per worker, like the pool stats on
+# /admin/db-stats; the dashboard shows the worker that served it.
+
+PENDING_RETRY_AFTER = 30
+REASONS = ('in_flight', 'pending', 'phone')
+
+
+class Rejected(Exception):
+    def __init__(self, reason, status, message, retry_after):
+        super().__init__(message)
+        self.reason = reason
+        self.status = status
+        self.message = message
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+    def response(self):
+        return {'error': self.message, 'retry_after': self.retry_after}, self.status, {'Retry-After': str(self.retry_after)}
+
+
+class OrderIntake:
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.admitted = 0
+        self.rejected = dict.fromkeys(REASONS, 0)
+        self.phones = {}  # phone -> deque of (time, idempotency key) of recent orders
+        self.started = datetime.now()
+
+    def _check_phone(self, phone, key, now):
+        limit = self.app.config['ORDER_PHONE_LIMIT']
+        if not limit or not phone:
+            return
+        window = self.app.config['ORDER_PHONE_WINDOW']
+        recent = self.phones.get(phone)
+        if recent is None:
+            return
+        while recent and now - recent[0][0] >= window:
+            recent.popleft()
+        if not recent:
+            del self.phones[phone]
+            return
+        # A retry of an order this phone already placed goes through to the idempotency check
+        if key and any(k == key for _, k in recent):
+            return
+        if len(recent) >= limit:
+            raise Rejected('phone', 429, 'Too many orders from this phone number. Please wait a little before ordering again.',
+                           window - (now - recent[0][0]))
+
+    def _check(self, phone, key):
+        config = self.app.config
+        now = time.monotonic()
+        self._check_phone(phone, key, now)
+        max_in_flight = config['ORDER_MAX_IN_FLIGHT']
+        if max_in_flight and self.in_flight >= max_in_flight:
+            raise Rejected('in_flight', 503, 'We are taking a lot of orders right now. Please try again in a moment.',
+                           config['ORDER_RETRY_AFTER'])
+        # A stale count gets re-read once the request has a slot
+        queue = kitchen_queue.get_queue()
+        if not queue.stale():
+            self._check_pending(queue)
+
+    def _check_pending(self, queue):
+        max_pending = self.app.config['ORDER_MAX_PENDING']
+        if max_pending and queue.pending_count() >= max_pending:
+            raise Rejected('pending', 503, 'The kitchen is at capacity. Please try again in a few minutes.',
+                           PENDING_RETRY_AFTER)
+
+    def _reject(self, error):
+        with self.lock:
+            self.rejected[error.reason] += 1
+        return error
+
+    @contextmanager
+    def admit(self, phone, key=None):
+        """Hold an intake slot for one order transaction, or raise Rejected.
+
+        Rejections don't touch the database, except that one request per
+        KITCHEN_SYNC_INTERVAL refreshes the Pending count when ORDER_MAX_PENDING is set.
+        """
+        phone = normalize_phone(phone)
+        with self.lock:
+            try:
+                self._check(phone, key)
+            except Rejected as e:
+                self.rejected[e.reason] += 1
+                raise
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if self.app.config['ORDER_MAX_PENDING']:
+                queue = kitchen_queue.get_queue()
+                queue.refresh()
+                try:
+                    self._check_pending(queue)
+                except Rejected as e:
+                    raise self._reject(e)
+            with self.lock:
+                self.admitted += 1
+            yield
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def record_order(self, phone, key=None):
+        """Count a committed order against its phone number."""
+        phone = normalize_phone(phone)
+        if not phone or not self.app.config['ORDER_PHONE_LIMIT']:
+            return
+        with self.lock:
+            self.phones.setdefault(phone, deque()).append((time.monotonic(), key))
+            if len(self.phones) > 10000:
+                self._prune()
+
+    def _prune(self):
+        window = self.app.config['ORDER_PHONE_WINDOW']
+        now = time.monotonic()
+        self.phones = {p: r for p, r in self.phones.items() if r and now - r[-1][0] < window}
+
+    def stats(self):
+        with self.lock:
+            return {
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'admitted': self.admitted,
+                'rejected': dict(self.rejected),
+                'rejected_total': sum(self.rejected.values()),
+                'tracked_phones': len(self.phones),
+                'since': self.started,
+                'limits': {k: self.app.config[k] for k in
+                           ('ORDER_MAX_IN_FLIGHT', 'ORDER_MAX_PENDING', 'ORDER_PHONE_LIMIT', 'ORDER_PHONE_WINDOW')},
+            }
+
+
+def normalize_phone(phone):
+    # Last 10 digits, so "+91 98765-43210" and "9876543210" count as one number
+    digits = re.sub(r'\D', '', str(phone or ''))
+    return digits[-10:] or None
+
+
+def init_app(app):
+    app.extensions['order_intake'] = OrderIntake(app)
+
+
+def get_intake():
+    return current_app.extensions['order_intake']
@@ -0,0 +1,98 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import date
+from flask import current_app
+from app.extensions import db
+from app.models import PageView
+from app.services.upsert import increment_rows
+
+logger = logging.getLogger(__name__)
+
+# Homepage hits all land on today's PageView row. Instead of a committed
+# UPDATE per hit, each worker adds hits up in memory and writes them with one
+# upsert every PAGE_VIEW_FLUSH_INTERVAL seconds or PAGE_VIEW_FLUSH_EVERY hits,
+# whichever comes first, plus a final flush when the worker exits. The
+# interval flush runs on a daemon thread per worker, so hits don't wait for
+# the next one to arrive.
+#
+# Serverless instances are frozen between requests and killed without running
+# exit handlers, so buffered hits would be lost there: use
+# PAGE_VIEW_FLUSH_EVERY=1 (the default on Vercel), which writes every hit.
+
+
+class _ViewBuffer:
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.last_flush = time.monotonic()
+        self.timer_pid = None
+
+    def add(self, day):
+        with self.lock:
+            self.pending[day] += 1
+            due = sum(self.pending.values()) >= self.app.config['PAGE_VIEW_FLUSH_EVERY']
+            if not due and self.timer_pid != os.getpid():
+                # Started by the first buffered hit, so every forked worker gets its own
+                self.timer_pid = os.getpid()
+                threading.Thread(target=self._flush_periodically, name='page-view-flush', daemon=True).start()
+        if due:
+            self.flush()
+
+    def _flush_periodically(self):
+        interval = self.app.config['PAGE_VIEW_FLUSH_INTERVAL']
+        while True:
+            with self.lock:
+                wait = self.last_flush + interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+                continue
+            if self.pending:
+                self.flush()
+            else:
+                # Nothing to write; check again one interval from now
+                with self.lock:
+                    self.last_flush = time.monotonic()
+
+    def flush(self):
+        with self.lock:
+            batch, self.pending = self.pending, Counter()
+            self.last_flush = time.monotonic()
+        if not batch:
+            return
+
+        rows = [{'date': day, 'count': count} for day, count in batch.items()]
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    increment_rows(conn, PageView.__table__, ['date'], ['count'], rows)
+        except Exception:
+            # Keep the hits for the next attempt rather than dropping them
+            logger.exception('Failed to flush page views')
+            with self.lock:
+                self.pending.update(batch)
+
+
+def init_app(app):
+    buffer = _ViewBuffer(app)
+    app.extensions['page_views'] = buffer
+    atexit.register(buffer.flush)
+
+
+def record_hit():
+    current_app.extensions['page_views'].add(date.today())
+
+
+def pending_count(day):
+    """Hits counted by this worker that have not been written yet."""
+    buffer = current_app.extensions['page_views']
+    with buffer.lock:
+        return buffer.pending.get(day, 0)
+
+
+def flush():
+    current_app.extensions['page_views'].flush()
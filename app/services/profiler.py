@@ -0,0 +1,219 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Opt-in request profiler (PROFILER=1). For every request it records the
+# number of SQL statements, time spent in the database, time spent rendering
+# templates and total latency, and folds them into per-endpoint histograms
+# shown on /admin/perf (and as JSON on /admin/perf.json). Requests slower
+# than PROFILER_SLOW_MS are logged with their SQL, and a statement repeated
+# PROFILER_N_PLUS_ONE times or more within one request is flagged as a
+# likely N+1. Numbers are per worker process and reset on restart.
+#
+# Each response also carries a Server-Timing header, so the same breakdown
+# shows up in the browser's network panel.
+
+# Upper bounds of the histogram buckets; the last bucket catches everything above
+MS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SLOW_LOG_SIZE = 50
+
+_whitespace = re.compile(r'\s+')
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        index = next((i for i, bound in enumerate(self.bounds) if value <= bound), len(self.bounds))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th value (the max for the overflow bucket)
+        if not self.count:
+            return 0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self):
+        labels = [f'<={b}' for b in self.bounds] + [f'>{self.bounds[-1]}']
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 2) if self.count else 0,
+            'p50': self.percentile(0.50),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'max': round(self.max, 2),
+            'buckets': [[label, n] for label, n in zip(labels, self.counts)], # In bucket order
+        }
+
+
+class EndpointStats:
+    def __init__(self):
+        self.total_ms = Histogram(MS_BUCKETS)
+        self.db_ms = Histogram(MS_BUCKETS)
+        self.template_ms = Histogram(MS_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.statuses = Counter()
+        self.slow = 0
+        self.n_plus_one = 0
+        self.n_plus_one_sample = None
+
+    def to_dict(self):
+        return {
+            'requests': self.total_ms.count,
+            'statuses': dict(self.statuses),
+            'total_ms': self.total_ms.to_dict(),
+            'db_ms': self.db_ms.to_dict(),
+            'template_ms': self.template_ms.to_dict(),
+            'queries': self.queries.to_dict(),
+            'slow_requests': self.slow,
+            'n_plus_one': self.n_plus_one,
+            'n_plus_one_sample': self.n_plus_one_sample,
+        }
+
+
+class Profiler:
+    def __init__(self, app):
+        self.slow_ms = app.config['PROFILER_SLOW_MS']
+        self.n_plus_one = app.config['PROFILER_N_PLUS_ONE']
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+            self.slow_log = deque(maxlen=SLOW_LOG_SIZE)
+            self.started_at = time.time()
+
+    # Request hooks
+
+    def before_request(self):
+        g._perf = {'start': time.perf_counter(), 'queries': [], 'db': 0.0, 'template': 0.0, 'templates': []}
+
+    def after_request(self, response):
+        perf = g.pop('_perf', None)
+        if perf is None:
+            return response
+        total = (time.perf_counter() - perf['start']) * 1000
+        db_ms = perf['db'] * 1000
+        template_ms = perf['template'] * 1000
+        endpoint = request.endpoint or 'unmatched'
+
+        repeated = Counter(statement for statement, _ in perf['queries']).most_common(1)
+        n_plus_one = repeated[0] if repeated and repeated[0][1] >= self.n_plus_one else None
+        slow = total >= self.slow_ms
+
+        with self.lock:
+            stats = self.endpoints.setdefault(endpoint, EndpointStats())
+            stats.total_ms.add(total)
+            stats.db_ms.add(db_ms)
+            stats.template_ms.add(template_ms)
+            stats.queries.add(len(perf['queries']))
+            stats.statuses[response.status_code] += 1
+            if n_plus_one:
+                stats.n_plus_one += 1
+                stats.n_plus_one_sample = {'statement': n_plus_one[0], 'times': n_plus_one[1]}
+            if slow:
+                stats.slow += 1
+                self.slow_log.appendleft({
+                    'at': time.time(),
+                    'endpoint': endpoint,
+                    'method': request.method,
+                    'path': request.full_path.rstrip('?'),
+                    'status': response.status_code,
+                    'total_ms': round(total, 1),
+                    'db_ms': round(db_ms, 1),
+                    'template_ms': round(template_ms, 1),
+                    'queries': [{'sql': s, 'ms': round(t * 1000, 2)} for s, t in perf['queries']],
+                })
+
+        if n_plus_one:
+            logger.warning('Possible N+1 in %s: statement ran %d times: %s', endpoint, n_plus_one[1], n_plus_one[0])
+        if slow:
+            logger.warning('Slow request %s %s: %.0f ms (db %.0f ms in %d queries, templates %.0f ms)\n%s',
+                           request.method, request.path, total, db_ms, len(perf['queries']), template_ms,
+                           '\n'.join(f'  {t * 1000:7.2f} ms  {s}' for s, t in perf['queries']))
+
+        response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{len(perf["queries"])} queries", '
+                                              f'tpl;dur={template_ms:.1f}, app;dur={total:.1f}')
+        return response
+
+    # SQLAlchemy and template signal handlers
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_perf_start', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = conn.info['_perf_start'].pop()
+        # Background threads (order feed, image workers) run queries outside any request
+        if has_request_context() and '_perf' in g:
+            elapsed = time.perf_counter() - start
+            g._perf['db'] += elapsed
+            g._perf['queries'].append((_whitespace.sub(' ', statement).strip(), elapsed))
+
+    def handle_error(self, context):
+        if context.connection is not None and context.connection.info.get('_perf_start'):
+            context.connection.info['_perf_start'].pop()
+
+    def before_render(self, sender, template, context, **extra):
+        if has_request_context() and '_perf' in g:
+            g._perf['templates'].append(time.perf_counter())
+
+    def rendered(self, sender, template, context, **extra):
+        if has_request_context() and '_perf' in g and g._perf['templates']:
+            start = g._perf['templates'].pop()
+            # Templates rendered from inside another render are already counted by the outer one
+            if not g._perf['templates']:
+                g._perf['template'] += time.perf_counter() - start
+
+    def snapshot(self):
+        with self.lock:
+            endpoints = {name: stats.to_dict() for name, stats in sorted(self.endpoints.items())}
+            slow_log = list(self.slow_log)
+        return {
+            'since': self.started_at,
+            'slow_ms': self.slow_ms,
+            'n_plus_one_threshold': self.n_plus_one,
+            'endpoints': endpoints,
+            'slow_requests': slow_log,
+        }
+
+
+def init_app(app):
+    if not app.config['PROFILER_ENABLED']:
+        return
+    from app.extensions import db
+
+    profiler = Profiler(app)
+    app.extensions['profiler'] = profiler
+    app.before_request(profiler.before_request)
+    app.after_request(profiler.after_request)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', profiler.before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', profiler.after_cursor_execute)
+        event.listen(db.engine, 'handle_error', profiler.handle_error)
+    before_render_template.connect(profiler.before_render, app)
+    template_rendered.connect(profiler.rendered, app)
+
+
+def get_profiler(app):
+    return app.extensions.get('profiler')
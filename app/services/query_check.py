@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, text, tuple_
+from app.extensions import db
+from app.models import Order, OrderItem, MenuItem
+
+# EXPLAINs the queries on the hot paths and reports the ones the database
+# would answer with a full table scan or an explicit sort. Run it with
+# `python migrate.py check` after changing a query or an index.
+#
+# Postgres is asked for its plan with sequential scans disabled: on a small
+# development table a seq scan is always cheapest, and what we want to know
+# is whether an index *can* serve the query, not whether it is worth it yet.
+
+
+def hot_queries():
+    """(name, statement) pairs mirroring the queries the routes run."""
+    cursor = datetime.utcnow()
+    live = select(Order).where(Order.is_deleted == False)
+    newest = (Order.created_at.desc(), Order.id.desc())
+    return [
+        ('orders page', live.order_by(*newest).limit(51)),
+        ('orders page, older', live.where(tuple_(Order.created_at, Order.id) < tuple_(cursor, 1000))
+            .order_by(*newest).limit(51)),
+        ('orders page, by status', live.where(Order.status == 'Pending').order_by(*newest).limit(51)),
+        ('orders page, by type', live.where(Order.order_type == 'Pre-book').order_by(*newest).limit(51)),
+        ('order items of a page', select(OrderItem).where(OrderItem.order_id.in_([1, 2, 3]))),
+        ('order items of a menu item', select(OrderItem).where(OrderItem.menu_item_id == 1)),
+        ('order feed poll', select(Order).where(Order.updated_at >= cursor - timedelta(seconds=5))
+            .order_by(Order.updated_at, Order.id)),
+        ('menu by category', select(MenuItem).where(MenuItem.category_id == 1, MenuItem.is_available == True)),
+    ]
+
+
+def _plan(conn, statement):
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    if conn.dialect.name == 'sqlite':
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    return [row[0] for row in conn.exec_driver_sql(f"EXPLAIN {sql}")]
+
+
+def _problems(dialect, plan):
+    problems = []
+    for line in plan:
+        if dialect == 'sqlite':
+            if line.startswith('SCAN') and 'INDEX' not in line:
+                problems.append(line)
+            elif 'TEMP B-TREE' in line:
+                problems.append(line)
+        elif 'Seq Scan' in line or line.strip().startswith('->  Sort') or line.startswith('Sort'):
+            problems.append(line.strip())
+    return problems
+
+
+def check(engine=None):
+    """Return [(name, plan, problems)] for every hot query."""
+    engine = engine or db.engine
+    results = []
+    with engine.connect() as conn:
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text("SET enable_seqscan = off"))
+        for name, statement in hot_queries():
+            plan = _plan(conn, statement)
+            results.append((name, plan, _problems(conn.dialect.name, plan)))
+        conn.rollback()
+    return results
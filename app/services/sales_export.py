@@ -0,0 +1,169 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from sqlalchemy import and_, case, func, select, distinct
+from app.extensions import db
+from app.models import Order, OrderItem, ArchivedOrder, ArchivedOrderItem, MenuItem
+from app.services.sales_rollup import SALES_STATUSES, _as_date
+
+# Sales exports for accounting. Order lines are read with yield_per, so rows
+# come off a server-side cursor in batches and are written straight into the
+# response: memory stays flat however long the date range is. The per-day and
+# per-item aggregates are GROUP BY queries and are small even for a year.
+#
+# By default the export counts what the dashboard counts: non-deleted orders
+# that are Pending or Completed ('sales'), archived ones included. The daily
+# 'orders' column is the dashboard's order count, so there it also includes
+# Cancelled orders, which add nothing to sales_total or items_sold. Pass
+# status='all' or a single status, and include_deleted=True, to widen or
+# narrow that.
+#
+# Customers type their own names, so CSV cells that a spreadsheet would run as
+# a formula are exported with a leading apostrophe.
+
+KINDS = ('orders', 'daily', 'items')
+FORMATS = ('csv', 'json')
+STATUS_FILTERS = ('sales', 'all', 'Pending', 'Completed', 'Cancelled')
+BATCH = 1000
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+ORDER_COLUMNS = ['order_id', 'created_at', 'customer_name', 'customer_phone', 'order_type', 'status',
+                 'is_deleted', 'order_total', 'menu_item_id', 'item_name', 'quantity', 'price_at_time', 'line_total']
+DAILY_COLUMNS = ['date', 'orders', 'sales_total', 'items_sold']
+ITEM_COLUMNS = ['menu_item_id', 'item_name', 'orders', 'quantity', 'revenue']
+
+
+# Live and archived orders (see services/archive.py); the export covers both
+SOURCES = ((ArchivedOrder, ArchivedOrderItem), (Order, OrderItem))
+
+
+def _filters(orders, start, end, status, include_deleted):
+    conditions = [orders.created_at >= start, orders.created_at < end + timedelta(days=1)]
+    if status == 'sales':
+        conditions.append(orders.status.in_(SALES_STATUSES))
+    elif status != 'all':
+        conditions.append(orders.status == status)
+    if not include_deleted:
+        conditions.append(orders.is_deleted == False)
+    return conditions
+
+
+def _order_lines(filters):
+    # Archived orders first: they are the older ones
+    for orders, order_items in SOURCES:
+        stmt = select(
+            orders.id, orders.created_at, orders.customer_name, orders.customer_phone, orders.order_type,
+            orders.status, orders.is_deleted, orders.total_price,
+            order_items.menu_item_id, MenuItem.name, order_items.quantity, order_items.price_at_time
+        ).outerjoin(order_items, order_items.order_id == orders.id) \
+            .outerjoin(MenuItem, MenuItem.id == order_items.menu_item_id) \
+            .where(*filters(orders)).order_by(orders.created_at, orders.id, order_items.id)
+        for row in db.session.execute(stmt.execution_options(yield_per=BATCH)):
+            line_total = round(row.quantity * row.price_at_time, 2) if row.quantity is not None else None
+            yield [row.id, row.created_at.isoformat(sep=' ', timespec='seconds'), row.customer_name, row.customer_phone,
+                   row.order_type, row.status, bool(row.is_deleted), row.total_price,
+                   row.menu_item_id, row.name, row.quantity, row.price_at_time, line_total]
+
+
+def _daily(filters, count_filters):
+    totals = {}
+    for orders, order_items in SOURCES:
+        day = func.date(orders.created_at)
+        # count_filters may take in more orders than filters; only the latter add to sales_total
+        counted = case((and_(*filters(orders)), orders.total_price), else_=0)
+        for d, count, total in db.session.execute(
+            select(day, func.count(orders.id), func.sum(counted)).where(*count_filters(orders)).group_by(day)
+        ):
+            row = totals.setdefault(_as_date(d), [0, 0, 0])
+            row[0] += count
+            row[1] += total or 0
+        # Item totals are summed separately so joining line items doesn't multiply order totals
+        for d, quantity in db.session.execute(
+            select(day, func.sum(order_items.quantity)).join(order_items, order_items.order_id == orders.id)
+            .where(*filters(orders)).group_by(day)
+        ):
+            totals.setdefault(_as_date(d), [0, 0, 0])[2] += quantity or 0
+    for d, (count, total, quantity) in sorted(totals.items()):
+        yield [d.isoformat(), count, round(total, 2), quantity]
+
+
+def _items(filters):
+    totals = {}
+    for orders, order_items in SOURCES:
+        for menu_item_id, name, count, quantity, revenue in db.session.execute(
+            select(order_items.menu_item_id, MenuItem.name, func.count(distinct(orders.id)),
+                   func.sum(order_items.quantity), func.sum(order_items.quantity * order_items.price_at_time))
+            .join(orders, orders.id == order_items.order_id)
+            .outerjoin(MenuItem, MenuItem.id == order_items.menu_item_id)
+            .where(*filters(orders)).group_by(order_items.menu_item_id, MenuItem.name)
+        ):
+            row = totals.setdefault(menu_item_id, [name, 0, 0, 0])
+            row[1] += count
+            row[2] += quantity or 0
+            row[3] += revenue or 0
+    for menu_item_id, (name, count, quantity, revenue) in sorted(totals.items(), key=lambda kv: -kv[1][2]):
+        yield [menu_item_id, name, count, quantity, round(revenue, 2)]
+
+
+def _cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv(columns, rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for i, row in enumerate(rows, start=1):
+        writer.writerow([_cell(value) for value in row])
+        if i % BATCH == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def _json(columns, rows, group_orders=False):
+    yield '['
+    first = True
+    if group_orders:
+        rows = _group_orders(columns, rows)
+    else:
+        rows = (dict(zip(columns, row)) for row in rows)
+    for record in rows:
+        yield ('\n' if first else ',\n') + json.dumps(record)
+        first = False
+    yield '\n]\n'
+
+
+def _group_orders(columns, rows):
+    # Lines arrive ordered by order, so each order's items are consecutive
+    split = columns.index('menu_item_id')
+    current = None
+    for row in rows:
+        if current is None or current['order_id'] != row[0]:
+            if current is not None:
+                yield current
+            current = dict(zip(columns[:split], row[:split]))
+            current['items'] = []
+        if row[split] is not None:
+            current['items'].append(dict(zip(columns[split:], row[split:])))
+    if current is not None:
+        yield current
+
+
+def export(kind, fmt, start, end, status='sales', include_deleted=False):
+    """Return a generator of text chunks for the requested export."""
+    filters = lambda orders: _filters(orders, start, end, status, include_deleted)
+    count_status = 'all' if status == 'sales' else status
+    count_filters = lambda orders: _filters(orders, start, end, count_status, include_deleted)
+    columns, rows = {
+        'orders': (ORDER_COLUMNS, _order_lines),
+        'daily': (DAILY_COLUMNS, lambda filters: _daily(filters, count_filters)),
+        'items': (ITEM_COLUMNS, _items),
+    }[kind]
+    if fmt == 'csv':
+        return _csv(columns, rows(filters))
+    return _json(columns, rows(filters), group_orders=kind == 'orders')
@@ -0,0 +1,134 @@
+from datetime import date
+from sqlalchemy import func, case, delete
+from app.extensions import db
+from app.models import Order, OrderItem, ArchivedOrder, ArchivedOrderItem, DailySales, DailyItemSales
+from app.services.upsert import increment_rows
+
+# The dashboard reads daily_sales / daily_item_sales instead of aggregating
+# the orders table. Every write that changes what an order contributes
+# (creation, status change, soft delete) applies the difference here, inside
+# the same transaction as the order change. rebuild() recomputes everything
+# from scratch and is safe to run at any time.
+
+SALES_STATUSES = ('Pending', 'Completed')
+
+
+def _contribution(status, is_deleted):
+    """(counts as an order, counts towards sales, counts towards item totals)"""
+    if is_deleted:
+        return 0, 0, 0
+    return 1, int(status in SALES_STATUSES), int(status != 'Cancelled')
+
+
+def _apply(day, total_price, items, order_delta, sales_delta, items_delta):
+    conn = db.session.connection()
+    if order_delta or sales_delta:
+        increment_rows(conn, DailySales.__table__, ['date'], ['order_count', 'sales_total'], [
+            {'date': day, 'order_count': order_delta, 'sales_total': sales_delta * (total_price or 0)}
+        ])
+    if items_delta and items:
+        quantities = {}
+        for menu_item_id, quantity in items:
+            quantities[menu_item_id] = quantities.get(menu_item_id, 0) + quantity
+        increment_rows(conn, DailyItemSales.__table__, ['date', 'menu_item_id'], ['quantity'], [
+            {'date': day, 'menu_item_id': menu_item_id, 'quantity': items_delta * quantity}
+            for menu_item_id, quantity in quantities.items()
+        ])
+
+
+def record_order_created(order, items):
+    """Add a freshly flushed order. items is a list of (menu_item_id, quantity)."""
+    order_c, sales_c, items_c = _contribution(order.status, order.is_deleted)
+    _apply(order.created_at.date(), order.total_price, items, order_c, sales_c, items_c)
+
+
+def record_order_changed(order, old_status, old_is_deleted):
+    """Move an order's contribution from its previous status/deleted flag to its current one."""
+    old = _contribution(old_status, old_is_deleted)
+    new = _contribution(order.status, order.is_deleted)
+    order_d, sales_d, items_d = (n - o for n, o in zip(new, old))
+    if not (order_d or sales_d or items_d):
+        return
+    items = [(i.menu_item_id, i.quantity) for i in order.items] if items_d else None
+    _apply(order.created_at.date(), order.total_price, items, order_d, sales_d, items_d)
+
+
+def record_orders_changed(changes):
+    """record_order_changed for many orders at once, in two upserts.
+
+    changes is a list of (row, new_status, new_is_deleted), where row carries the
+    order's id, created_at, total_price and its previous status and is_deleted.
+    """
+    daily, item_orders = {}, {}
+    for row, status, is_deleted in changes:
+        old = _contribution(row.status, row.is_deleted)
+        new = _contribution(status, is_deleted)
+        order_d, sales_d, items_d = (n - o for n, o in zip(new, old))
+        day = row.created_at.date()
+        if order_d or sales_d:
+            count, total = daily.get(day, (0, 0))
+            daily[day] = (count + order_d, total + sales_d * (row.total_price or 0))
+        if items_d:
+            item_orders[row.id] = (day, items_d)
+
+    quantities = {}
+    if item_orders:
+        for order_id, menu_item_id, quantity in db.session.query(
+            OrderItem.order_id, OrderItem.menu_item_id, OrderItem.quantity
+        ).filter(OrderItem.order_id.in_(list(item_orders))):
+            day, items_d = item_orders[order_id]
+            key = (day, menu_item_id)
+            quantities[key] = quantities.get(key, 0) + items_d * (quantity or 0)
+
+    conn = db.session.connection()
+    increment_rows(conn, DailySales.__table__, ['date'], ['order_count', 'sales_total'], [
+        {'date': day, 'order_count': count, 'sales_total': total}
+        for day, (count, total) in daily.items() if count or total
+    ])
+    increment_rows(conn, DailyItemSales.__table__, ['date', 'menu_item_id'], ['quantity'], [
+        {'date': day, 'menu_item_id': menu_item_id, 'quantity': quantity}
+        for (day, menu_item_id), quantity in quantities.items() if quantity
+    ])
+
+
+def _as_date(value):
+    # func.date() returns a string on SQLite and a date on Postgres
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def rebuild():
+    """Recompute both rollup tables from live and archived orders. The caller commits."""
+    db.session.execute(delete(DailyItemSales))
+    db.session.execute(delete(DailySales))
+
+    daily, items = {}, {}
+    for orders, order_items in ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem)):
+        day = func.date(orders.created_at)
+        for d, count, total in db.session.query(
+            day,
+            func.count(orders.id),
+            func.sum(case((orders.status.in_(SALES_STATUSES), orders.total_price), else_=0))
+        ).filter(orders.is_deleted == False).group_by(day):
+            count_sum, total_sum = daily.get(_as_date(d), (0, 0))
+            daily[_as_date(d)] = (count_sum + count, total_sum + (total or 0))
+
+        for d, menu_item_id, quantity in db.session.query(
+            day, order_items.menu_item_id, func.sum(order_items.quantity)
+        ).join(orders, orders.id == order_items.order_id).filter(
+            orders.is_deleted == False,
+            orders.status != 'Cancelled'
+        ).group_by(day, order_items.menu_item_id):
+            key = (_as_date(d), menu_item_id)
+            items[key] = items.get(key, 0) + (quantity or 0)
+
+    if daily:
+        db.session.execute(DailySales.__table__.insert(), [
+            {'date': d, 'order_count': count, 'sales_total': total}
+            for d, (count, total) in daily.items()
+        ])
+    if items:
+        db.session.execute(DailyItemSales.__table__.insert(), [
+            {'date': d, 'menu_item_id': menu_item_id, 'quantity': quantity}
+            for (d, menu_item_id), quantity in items.items()
+        ])
+    return len(daily), len(items)
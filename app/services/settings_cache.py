@@ -0,0 +1,55 @@
+import threading
+import time
+from types import MappingProxyType
+from flask import current_app
+from app.models import Setting
+
+# Settings change a few times a day but are read by every public request.
+# Each worker keeps a read-only snapshot and reloads it once it is older than
+# SETTINGS_CACHE_TTL seconds, so writes made through another gunicorn worker
+# become visible within that window. Writes made in this worker call
+# invalidate() and are visible immediately.
+#
+# With threaded workers, one thread reloads an expired snapshot while the
+# others keep serving the previous one, instead of all of them queueing
+# behind the reload's round trip. Callers that pass max_age (create_order
+# checking the shop is open) always wait for a fresh copy.
+
+_lock = threading.Lock()
+
+
+def _state():
+    return current_app.extensions.setdefault('settings_cache', {'snapshot': None, 'loaded_at': 0.0})
+
+
+def get_settings(max_age=None):
+    """Return an immutable snapshot of all settings as a key -> value mapping."""
+    strict = max_age is not None
+    if max_age is None:
+        max_age = current_app.config['SETTINGS_CACHE_TTL']
+
+    state = _state()
+    snapshot = state['snapshot']
+    if snapshot is not None and time.monotonic() - state['loaded_at'] < max_age:
+        return snapshot
+
+    if not _lock.acquire(blocking=snapshot is None or strict):
+        return snapshot  # another thread is reloading it
+    try:
+        # Another thread may have reloaded while we waited for the lock
+        if state['snapshot'] is not None and time.monotonic() - state['loaded_at'] < max_age:
+            return state['snapshot']
+        snapshot = MappingProxyType({s.key: s.value for s in Setting.query.all()})
+        state['snapshot'] = snapshot
+        state['loaded_at'] = time.monotonic()
+        return snapshot
+    finally:
+        _lock.release()
+
+
+def invalidate():
+    """Drop this worker's snapshot so the next read goes to the database."""
+    with _lock:
+        state = _state()
+        state['snapshot'] = None
+        state['loaded_at'] = 0.0
@@ -0,0 +1,31 @@
+from flask.sessions import SecureCookieSessionInterface
+
+# Responses that are the same for every visitor (menu pages, /api/menu, asset
+# bundles, uploaded images) are sent Cache-Control: public so CDN edges can
+# store them. Flask adds Vary: Cookie to any response whose request looked at
+# the session, and Flask-Login's after_request hook looks at it on every
+# request, so without this every one of them varied on Cookie and most CDNs
+# would not store or share them.
+#
+# share(response) marks a response whose body doesn't depend on the session.
+# The session is then not saved for it: no Vary: Cookie, no Set-Cookie. Only
+# mark responses that neither change the session nor depend on it (a page
+# showing flash messages does both).
+
+
+class SharedResponseSessionInterface(SecureCookieSessionInterface):
+    """Cookie sessions that leave responses marked by share() alone."""
+
+    def save_session(self, app, session, response):
+        if getattr(response, 'shared', False):
+            return
+        super().save_session(app, session, response)
+
+
+def share(response):
+    response.shared = True
+    return response
+
+
+def init_app(app):
+    app.session_interface = SharedResponseSessionInterface()
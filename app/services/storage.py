@@ -0,0 +1,75 @@
+import os
+import tempfile
+from flask import current_app, send_from_directory, url_for
+from werkzeug.utils import import_string
+from app.services.shared_cache import share
+
+# Uploaded files are named by their content hash, so a stored name never
+# changes meaning and can be cached forever. The backend is chosen with the
+# STORAGE_BACKEND setting (an import path); any class with this interface can
+# stand in for object storage.
+
+ONE_YEAR = 31536000
+
+
+class LocalStorage:
+    """Stores uploads as files in a directory on local disk."""
+
+    def __init__(self, app):
+        self.app = app
+        self._root = None
+
+    @property
+    def root(self):
+        # Resolved on first use rather than at startup, so cold starts that only
+        # render pages never touch the filesystem. Read-only deployments
+        # (serverless) fall back to /tmp.
+        if self._root is None:
+            folder = self.app.config['UPLOAD_FOLDER']
+            try:
+                os.makedirs(folder, exist_ok=True)
+            except OSError:
+                folder = os.path.join(tempfile.gettempdir(), 'uploads')
+                os.makedirs(folder, exist_ok=True)
+                self.app.config['UPLOAD_FOLDER'] = folder
+            self._root = folder
+        return self._root
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.root, name))
+
+    def save(self, name, data):
+        # Write to a temporary file first so readers never see a partial upload
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.upload-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.root, name))
+
+    def open(self, name):
+        return open(os.path.join(self.root, name), 'rb')
+
+    def delete(self, name):
+        path = os.path.join(self.root, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def list(self, prefix):
+        return [name for name in os.listdir(self.root) if name.startswith(prefix)]
+
+    def url(self, name):
+        return url_for('public.media', filename=name)
+
+    def serve(self, name):
+        response = send_from_directory(self.root, name, max_age=ONE_YEAR)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return share(response)
+
+
+def init_app(app):
+    backend = import_string(app.config['STORAGE_BACKEND'])
+    app.extensions['storage'] = backend(app)
+
+
+def get_storage():
+    return current_app.extensions['storage']
@@ -0,0 +1,34 @@
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def increment_rows(conn, table, key_columns, counter_columns, rows):
+    """Add each row's counter values onto the matching row, inserting it if missing.
+
+    Uses a single INSERT ... ON CONFLICT DO UPDATE on Postgres and SQLite, so
+    concurrent writers never lose increments and no row is read first.
+    """
+    if not rows:
+        return
+
+    dialect = conn.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[k] for k in key_columns],
+            set_={c: table.c[c] + stmt.excluded[c] for c in counter_columns}
+        )
+        conn.execute(stmt, rows)
+        return
+
+    # Other backends: read-modify-write, relying on the caller's transaction
+    for row in rows:
+        where = [table.c[k] == row[k] for k in key_columns]
+        exists = conn.execute(select(table.c[key_columns[0]]).where(*where)).first()
+        if exists:
+            conn.execute(update(table).where(*where).values(
+                {c: table.c[c] + row[c] for c in counter_columns}
+            ))
+        else:
+            conn.execute(table.insert().values(row))
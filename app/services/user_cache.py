@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from flask_login import UserMixin
+from app.extensions import db
+from app.models import User
+
+# Flask-Login calls the user loader on every request from a logged-in admin.
+# Instead of a users-table query each time, each worker keeps a small LRU of
+# identities that expire after USER_CACHE_TTL seconds.
+#
+# The session stores "<id>:<credential version>" (see User.get_id). The
+# version is a fingerprint of the password hash, so changing the password
+# makes every other session's id stale: a cached entry is only used when the
+# versions match, and on a mismatch the database decides. A password change
+# made through another worker is noticed here once the entry expires.
+
+_lock = threading.Lock()
+
+
+class CachedUser(UserMixin):
+    """Read-only identity held in the cache; load the User row to change anything."""
+
+    def __init__(self, user):
+        self.id = user.id
+        self.username = user.username
+        self.credential_version = user.credential_version
+
+    def get_id(self):
+        return f"{self.id}:{self.credential_version}"
+
+
+def _entries():
+    return current_app.extensions.setdefault('user_cache', OrderedDict())
+
+
+def parse_id(session_id):
+    """(user id, credential version) from a session id, or None if malformed or from before versions."""
+    user_id, _, version = str(session_id).partition(':')
+    if not user_id.isdigit() or not version:
+        return None
+    return int(user_id), version
+
+
+def load(session_id):
+    parsed = parse_id(session_id)
+    if parsed is None:
+        return None
+    user_id, version = parsed
+    entries = _entries()
+    with _lock:
+        entry = entries.get(user_id)
+        if entry is not None:
+            user, loaded_at = entry
+            if user.credential_version == version and time.monotonic() - loaded_at < current_app.config['USER_CACHE_TTL']:
+                entries.move_to_end(user_id)
+                return user
+
+    row = db.session.get(User, user_id)
+    if row is None:
+        invalidate(user_id)
+        return None
+    user = CachedUser(row)
+    with _lock:
+        entries[user_id] = (user, time.monotonic())
+        entries.move_to_end(user_id)
+        while len(entries) > current_app.config['USER_CACHE_SIZE']:
+            entries.popitem(last=False)
+    return user if user.credential_version == version else None
+
+
+def invalidate(user_id):
+    """Forget a user after their credentials changed in this worker."""
+    with _lock:
+        _entries().pop(user_id, None)
@@ -0,0 +1,26 @@
+import argparse
+from app import create_app
+from app.extensions import db
+from app.services import archive, migrations
+
+def archive_orders():
+    parser = argparse.ArgumentParser(description='Move soft-deleted and old finished orders into the archive tables.')
+    parser.add_argument('--retention-days', type=int, help='archive Completed/Cancelled orders older than this (default ARCHIVE_AFTER_DAYS)')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--max-batches', type=int, help='stop after this many batches; run again to continue')
+    parser.add_argument('--dry-run', action='store_true', help='only count the orders that would be archived')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        # Make sure the archive tables exist on databases created before they were added
+        migrations.upgrade(db.engine)
+        retention_days = args.retention_days if args.retention_days is not None else app.config['ARCHIVE_AFTER_DAYS']
+        if args.dry_run:
+            print(f"{archive.eligible_count(retention_days)} orders would be archived (retention {retention_days} days).")
+            return
+        archived, batches, more = archive.archive_orders(retention_days, args.batch_size, max_batches=args.max_batches)
+        print(f"Archived {archived} orders in {batches} batches." + (" More remain; run again to continue." if more else ""))
+
+if __name__ == '__main__':
+    archive_orders()
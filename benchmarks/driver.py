@@ -0,0 +1,367 @@
+"""Drive the hot endpoints and write a JSON report.
+
+    python -m benchmarks.driver --database benchmarks/bench.db --requests 500
+    python -m benchmarks.driver --database benchmarks/bench.db --gunicorn --workers 4 --concurrency 8
+    python -m benchmarks.driver --gunicorn --worker-class gthread --threads 8 --db-latency-ms 5
+
+By default requests go through the Flask test client in this process, which
+also counts the SQL statements each request runs. --gunicorn starts a local
+gunicorn on the same database and samples its memory (PSS of the master and
+workers), and --url targets a server that is already running; over HTTP only
+latency and throughput are measured. --db-latency-ms delays every SQL
+statement, so SQLite behaves like a database across the network.
+
+The order intake limits (app/services/order_intake.py) are turned off for the
+app under test, and every order comes from a different phone number, so
+create_order measures placing orders rather than turning them away. A server
+given with --url keeps its own limits; rejected orders show up as errors.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from datetime import datetime
+
+from benchmarks.report import WRITE_SCENARIOS, summarize, print_summary
+
+SCENARIOS = ['index', 'menu', 'order_success', 'create_order', 'dashboard', 'orders']
+ADMIN = {'username': 'admin', 'password': 'admin-password-123'} # Created by init_db.py
+# Admission control off, for the test client and for --gunicorn
+INTAKE_LIMITS_OFF = {'ORDER_MAX_IN_FLIGHT': 0, 'ORDER_MAX_PENDING': 0, 'ORDER_PHONE_LIMIT': 0}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', default='benchmarks/bench.db', help='SQLite file made by benchmarks.seed')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated subset of ' + ', '.join(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=500, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--gunicorn', action='store_true', help='start a local gunicorn and drive it over HTTP')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--worker-class', default='sync', help='gunicorn worker class, e.g. sync or gthread')
+    parser.add_argument('--threads', type=int, default=1, help='threads per gunicorn worker (gthread)')
+    parser.add_argument('--db-latency-ms', type=float, default=0, help='delay added before every SQL statement')
+    parser.add_argument('--gunicorn-args', default='', help='extra gunicorn arguments')
+    parser.add_argument('--url', help='drive an already running server instead')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='report file (default benchmarks/results/<timestamp>.json)')
+    return parser.parse_args(argv)
+
+
+class Workload:
+    """Builds randomized but reproducible requests from the seeded data."""
+
+    def __init__(self, categories, item_ids, order_ids, seed):
+        self.categories = categories
+        self.item_ids = item_ids
+        self.order_ids = order_ids
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def request(self, scenario):
+        """(method, path, json_body) for one request of a scenario."""
+        with self.lock:
+            rng = self.rng
+            if scenario == 'index':
+                return 'GET', '/', None
+            if scenario == 'order_success':
+                return 'GET', f"/order-success/{rng.choice(self.order_ids)}", None
+            if scenario == 'menu':
+                category = rng.choice([None] + self.categories)
+                return 'GET', f"/menu?category={category}" if category else '/menu', None
+            if scenario == 'create_order':
+                items = [{'id': i, 'quantity': rng.randint(1, 3)} for i in rng.sample(self.item_ids, rng.randint(1, 4))]
+                return 'POST', '/create-order', {
+                    'name': 'Bench', 'phone': f'9{rng.randrange(10 ** 9):09d}', 'order_type': rng.choice(['At Stall', 'Pre-book']),
+                    'arrival_time': '07:30 PM', 'items': items, 'idempotency_key': uuid.uuid4().hex,
+                }
+            if scenario == 'dashboard':
+                return 'GET', '/admin/', None
+            if scenario == 'orders':
+                query = rng.choice(['', '?status=Pending', '?type=Pre-book', '?q=Priya', '?status=Completed&type=At+Stall'])
+                return 'GET', f"/admin/orders{query}", None
+        raise ValueError(scenario)
+
+
+class TestClientTarget:
+    """In-process Flask test client; counts SQL statements per request."""
+
+    name = 'test-client'
+
+    def __init__(self, database, db_latency_ms=0):
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.abspath(database)}"
+        from sqlalchemy import event
+        from app import create_app
+        from app.extensions import db
+        from benchmarks.latency_app import add_latency
+
+        self.app = create_app()
+        add_latency(self.app, db_latency_ms)
+        # Checkout uses a per-page token; the benchmark logs in and posts directly
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config.update(INTAKE_LIMITS_OFF)
+        self.counter = threading.local()
+        with self.app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._count)
+        self.clients = threading.local()
+
+    def _count(self, *args):
+        self.counter.n = getattr(self.counter, 'n', 0) + 1
+
+    def connect(self):
+        self._client()
+
+    def _client(self):
+        client = getattr(self.clients, 'client', None)
+        if client is None:
+            client = self.clients.client = self.app.test_client()
+            client.post('/auth/login', data=ADMIN)
+        return client
+
+    def send(self, method, path, body):
+        client = self._client()
+        self.counter.n = 0
+        response = client.open(path, method=method, json=body)
+        response.close()
+        return response.status_code, self.counter.n
+
+    def close(self):
+        pass
+
+
+class HttpTarget:
+    """A running server, reached over HTTP with a logged-in session per thread."""
+
+    def __init__(self, base_url, process=None):
+        self.name = base_url
+        self.base_url = base_url.rstrip('/')
+        self.process = process
+        self.sessions = threading.local()
+
+    def connect(self):
+        self._session()
+
+    def _session(self):
+        session = getattr(self.sessions, 'session', None)
+        if session is None:
+            opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+            page = opener.open(self.base_url + '/auth/login').read().decode()
+            token = re.search(r'name="csrf_token" value="([^"]+)"', page).group(1)
+            form = urllib.parse.urlencode({**ADMIN, 'csrf_token': token}).encode()
+            opener.open(self.base_url + '/auth/login', data=form).read()
+            session = self.sessions.session = (opener, token)
+        return session
+
+    def send(self, method, path, body):
+        opener, token = self._session()
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if body is not None:
+            request.add_header('Content-Type', 'application/json')
+            request.add_header('X-CSRFToken', token)
+        try:
+            with opener.open(request, timeout=30) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as e:
+            return e.code, None
+        except OSError:
+            return 0, None
+
+    def memory_mb(self):
+        """PSS of the server and its workers, so pages shared after fork count once."""
+        if not self.process:
+            return None
+        pids = [self.process.pid]
+        for pid in pids:
+            try:
+                with open(f'/proc/{pid}/task/{pid}/children') as f:
+                    pids.extend(int(child) for child in f.read().split())
+            except OSError:
+                pass
+        total = 0
+        for pid in pids:
+            total += _pss_kb(pid) or 0
+        return round(total / 1024, 1) if total else None
+
+    def close(self):
+        if self.process:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+
+
+def _pss_kb(pid):
+    # Linux only; elsewhere memory is simply not reported
+    for path, field in ((f'/proc/{pid}/smaps_rollup', 'Pss:'), (f'/proc/{pid}/status', 'VmRSS:')):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1])
+        except OSError:
+            continue
+    return None
+
+
+def start_gunicorn(database, workers, extra_args, worker_class='sync', threads=1, db_latency_ms=0):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.abspath(database)}",
+               BENCH_DB_LATENCY_MS=str(db_latency_ms), **{k: str(v) for k, v in INTAKE_LIMITS_OFF.items()})
+    cmd = [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+           '--worker-class', worker_class, '--threads', str(threads),
+           '--log-level', 'warning', *extra_args.split(),
+           'benchmarks.latency_app:app' if db_latency_ms else 'run:app']
+    process = subprocess.Popen(cmd, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return HttpTarget(f'http://127.0.0.1:{port}', process)
+        except OSError:
+            if process.poll() is not None:
+                sys.exit('gunicorn exited during startup')
+            time.sleep(0.2)
+    process.terminate()
+    sys.exit('gunicorn did not start within 30s')
+
+
+def run_scenario(target, workload, scenario, n_requests, concurrency):
+    latencies, statuses, queries = [], [], []
+    lock = threading.Lock()
+    remaining = iter(range(n_requests))
+
+    # Log in outside the measured window; sessions are per thread
+    ready = threading.Barrier(concurrency + 1)
+
+    def worker():
+        target.connect()
+        ready.wait()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            method, path, body = workload.request(scenario)
+            start = time.perf_counter()
+            status, n_queries = target.send(method, path, body)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses.append(status)
+                if n_queries is not None:
+                    queries.append(n_queries)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    started = time.perf_counter()
+    memory = _sample_memory(target, threads)
+    summary = summarize(latencies, statuses, queries, time.perf_counter() - started,
+                        write=scenario in WRITE_SCENARIOS)
+    if memory:
+        summary['memory_mb'] = {'mean': round(sum(memory) / len(memory), 1), 'peak': max(memory)}
+    return summary
+
+
+def _sample_memory(target, threads, interval=0.25):
+    # Waits for the threads, sampling the server's memory meanwhile when it can be read
+    sample = getattr(target, 'memory_mb', None)
+    samples = []
+    for thread in threads:
+        while thread.is_alive():
+            mb = sample() if sample else None
+            if mb:
+                samples.append(mb)
+            thread.join(interval)
+    return samples
+
+
+def _dataset(database):
+    import sqlite3
+    with sqlite3.connect(database) as conn:
+        counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ('categories', 'menu_items', 'orders', 'order_items', 'page_views')}
+        categories = [row[0] for row in conn.execute("SELECT id FROM categories")]
+        item_ids = [row[0] for row in conn.execute("SELECT id FROM menu_items WHERE is_available")]
+        order_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM orders WHERE NOT is_deleted ORDER BY id DESC LIMIT 1000")]
+    return counts, categories, item_ids, order_ids
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.database):
+        sys.exit(f"{args.database} not found; create it with python -m benchmarks.seed")
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    counts, categories, item_ids, order_ids = _dataset(args.database)
+    workload = Workload(categories, item_ids, order_ids, args.seed)
+    if args.url:
+        target = HttpTarget(args.url)
+    elif args.gunicorn:
+        target = start_gunicorn(args.database, args.workers, args.gunicorn_args,
+                                args.worker_class, args.threads, args.db_latency_ms)
+    else:
+        target = TestClientTarget(args.database, args.db_latency_ms)
+
+    report = {
+        'meta': {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'target': target.name,
+            'gunicorn_workers': args.workers if args.gunicorn else None,
+            'gunicorn_worker_class': args.worker_class if args.gunicorn else None,
+            'gunicorn_threads': args.threads if args.gunicorn else None,
+            'db_latency_ms': args.db_latency_ms,
+            'concurrency': args.concurrency,
+            'requests_per_scenario': args.requests,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'dataset': counts,
+        },
+        'scenarios': {},
+    }
+    try:
+        for scenario in scenarios:
+            run_scenario(target, workload, scenario, args.warmup, args.concurrency)
+            report['scenarios'][scenario] = run_scenario(target, workload, scenario, args.requests, args.concurrency)
+    finally:
+        target.close()
+
+    output = args.output or os.path.join('benchmarks', 'results', datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_summary(report)
+    print(f"Report written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""The app with a fixed delay before every SQL statement, standing in for the
+network round trip to a remote database or pooler that local SQLite doesn't have.
+
+    BENCH_DB_LATENCY_MS=5 gunicorn benchmarks.latency_app:app
+"""
+import os
+import time
+
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+
+
+def add_latency(app, ms):
+    """Sleep ms before each statement. Like a socket wait, the sleep releases the GIL."""
+    if not ms:
+        return
+    delay = ms / 1000
+
+    def round_trip(*args):
+        time.sleep(delay)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', round_trip)
+
+
+app = create_app()
+add_latency(app, float(os.environ.get('BENCH_DB_LATENCY_MS', 0)))
@@ -0,0 +1,124 @@
+"""Summarize benchmark samples and compare two JSON reports.
+
+    python -m benchmarks.report baseline.json candidate.json --threshold 0.10
+
+Exits with status 1 when a scenario's p95 latency, queries per request or
+error count got worse by more than the threshold.
+
+Errors are 5xx responses and failed connections; on write scenarios a 4xx
+(a rejected or invalid order) is an error too, since nothing was written.
+client_errors counts the 4xx responses of every scenario.
+"""
+import argparse
+import json
+import sys
+
+WRITE_SCENARIOS = {'create_order'}
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, statuses, queries, duration, write=False):
+    """Scenario summary from per-request latencies (seconds), status codes and SQL query counts.
+
+    write: the scenario should change data, so 4xx responses count as errors.
+    """
+    ms = sorted(latency * 1000 for latency in latencies)
+    codes = {}
+    for status in statuses:
+        codes[str(status)] = codes.get(str(status), 0) + 1
+    summary = {
+        'requests': len(ms),
+        'errors': sum(1 for status in statuses if status >= 500 or status == 0 or (write and status >= 400)),
+        'client_errors': sum(1 for status in statuses if 400 <= status < 500),
+        'status_codes': codes,
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(len(ms) / duration, 1) if duration else None,
+        'latency_ms': {
+            'mean': round(sum(ms) / len(ms), 2) if ms else None,
+            'p50': _round(percentile(ms, 0.50)),
+            'p95': _round(percentile(ms, 0.95)),
+            'p99': _round(percentile(ms, 0.99)),
+            'max': _round(ms[-1] if ms else None),
+        },
+        'queries_per_request': None,
+    }
+    if queries:
+        queries = sorted(queries)
+        summary['queries_per_request'] = {
+            'mean': round(sum(queries) / len(queries), 2),
+            'p95': percentile(queries, 0.95),
+            'max': queries[-1],
+        }
+    return summary
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def print_summary(report):
+    print(f"{'scenario':<16}{'req':>7}{'err':>5}{'4xx':>5}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'MB':>8}")
+    for name, s in report['scenarios'].items():
+        lat = s['latency_ms']
+        queries = s['queries_per_request']['mean'] if s['queries_per_request'] else '-'
+        memory = s['memory_mb']['peak'] if s.get('memory_mb') else '-'
+        print(f"{name:<16}{s['requests']:>7}{s['errors']:>5}{s.get('client_errors', '-'):>5}{s['throughput_rps']:>9}"
+              f"{lat['p50']:>9}{lat['p95']:>9}{lat['p99']:>9}{queries:>9}{memory:>8}")
+
+
+def compare(old, new, threshold=0.10):
+    """Return [(scenario, metric, old, new)] for metrics that regressed by more than threshold."""
+    regressions = []
+    for name, after in new['scenarios'].items():
+        before = old['scenarios'].get(name)
+        if not before:
+            continue
+        metrics = [('p95 ms', before['latency_ms']['p95'], after['latency_ms']['p95'])]
+        if before['queries_per_request'] and after['queries_per_request']:
+            metrics.append(('queries', before['queries_per_request']['mean'], after['queries_per_request']['mean']))
+        for metric, a, b in metrics:
+            if a is not None and b is not None and b > a * (1 + threshold):
+                regressions.append((name, metric, a, b))
+        if after['errors'] > before['errors']:
+            regressions.append((name, 'errors', before['errors'], after['errors']))
+        # Reports written before client_errors existed don't have it
+        if 'client_errors' in before and after.get('client_errors', 0) > before['client_errors']:
+            regressions.append((name, '4xx', before['client_errors'], after['client_errors']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two benchmark reports.')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed relative slowdown (default 0.10)')
+    args = parser.parse_args(argv)
+    with open(args.baseline) as f:
+        old = json.load(f)
+    with open(args.candidate) as f:
+        new = json.load(f)
+
+    print(f"{'scenario':<16}{'p95 ms':>18}{'rps':>18}{'queries':>14}")
+    for name, after in new['scenarios'].items():
+        before = old['scenarios'].get(name)
+        if not before:
+            continue
+        q = lambda s: s['queries_per_request']['mean'] if s['queries_per_request'] else '-'
+        print(f"{name:<16}{before['latency_ms']['p95']:>8} -> {after['latency_ms']['p95']:<7}"
+              f"{before['throughput_rps']:>8} -> {after['throughput_rps']:<7}{q(before):>5} -> {q(after)}")
+
+    regressions = compare(old, new, args.threshold)
+    for name, metric, a, b in regressions:
+        print(f"REGRESSION  {name}: {metric} {a} -> {b}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Seed a SQLite database with a realistic volume of menu, order and traffic data.
+
+    python -m benchmarks.seed --database benchmarks/bench.db --orders 100000
+
+The same --seed always produces the same data, so runs against separately
+seeded databases stay comparable.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Diya', 'Ananya', 'Ishaan', 'Kabir', 'Meera', 'Priya', 'Rohan',
+               'Saanvi', 'Arjun', 'Neha', 'Rahul', 'Pooja', 'Vikram', 'Sneha', 'Karan', 'Aisha', 'Nikhil']
+DISHES = ['Paneer Tikka', 'Masala Dosa', 'Chole Bhature', 'Butter Chicken', 'Veg Biryani', 'Chicken Biryani',
+          'Pav Bhaji', 'Vada Pav', 'Samosa', 'Aloo Paratha', 'Rajma Chawal', 'Dal Makhani', 'Idli Sambar',
+          'Fish Curry', 'Mutton Rogan Josh', 'Kathi Roll', 'Momos', 'Pani Puri', 'Lassi', 'Masala Chai']
+CATEGORIES = ['Starters', 'Mains', 'Biryani', 'Breads', 'South Indian', 'Street Food', 'Rolls', 'Chinese',
+              'Thalis', 'Desserts', 'Beverages', 'Combos']
+# Share of a day's orders placed in each hour: lunch and dinner peaks
+HOURLY_WEIGHTS = [0, 0, 0, 0, 0, 0, 0, 0, 1, 2, 3, 6, 10, 12, 8, 4, 3, 4, 6, 9, 12, 10, 5, 2]
+BATCH = 5000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', default='benchmarks/bench.db', help='SQLite file to create')
+    parser.add_argument('--items', type=int, default=300)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--days', type=int, default=180, help='spread orders and page views over this many days')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--force', action='store_true', help='overwrite an existing database')
+    return parser.parse_args(argv)
+
+
+def _menu(rng, n_items):
+    categories = [{'id': i, 'name': name, 'created_at': datetime(2024, 1, 1)}
+                  for i, name in enumerate(CATEGORIES, start=1)]
+    items = []
+    for i in range(1, n_items + 1):
+        name = f"{rng.choice(DISHES)} {'Special' if i % 7 == 0 else ''} #{i}".replace('  ', ' ')
+        items.append({
+            'id': i,
+            'name': name,
+            'description': f"House {name.lower()} made fresh to order.",
+            'price': float(rng.choice(range(40, 420, 10))),
+            'category_id': rng.randint(1, len(categories)),
+            'is_available': rng.random() < 0.9,
+            'is_non_veg': rng.random() < 0.3,
+            'created_at': datetime(2024, 1, 1),
+            'updated_at': datetime(2024, 1, 1),
+        })
+    return categories, items
+
+
+def _order_times(rng, n_orders, days):
+    """Creation times for n_orders over the last `days` days, busier recently and at meal times."""
+    today = date.today()
+    # Linear growth: the most recent day gets about three times the orders of the first
+    day_weights = [1 + 2 * i / max(1, days - 1) for i in range(days)]
+    start = today - timedelta(days=days - 1)
+    picked_days = rng.choices(range(days), weights=day_weights, k=n_orders)
+    picked_hours = rng.choices(range(24), weights=HOURLY_WEIGHTS, k=n_orders)
+    times = [datetime.combine(start + timedelta(days=d), datetime.min.time())
+             + timedelta(hours=h, seconds=rng.randrange(3600))
+             for d, h in zip(picked_days, picked_hours)]
+    times.sort()
+    return times
+
+
+def _orders(rng, items, times):
+    today = date.today()
+    available = [item for item in items if item['is_available']]
+    popularity = [rng.paretovariate(1.2) for _ in available] # A few dishes sell most
+    prices = {item['id']: item['price'] for item in available}
+    for order_id, created_at in enumerate(times, start=1):
+        lines = {}
+        for item in rng.choices(available, weights=popularity, k=rng.choices([1, 2, 3, 4, 5], [35, 30, 20, 10, 5])[0]):
+            lines[item['id']] = lines.get(item['id'], 0) + rng.choices([1, 2, 3], [75, 20, 5])[0]
+        if created_at.date() == today:
+            status = rng.choices(['Pending', 'Completed', 'Cancelled'], [40, 55, 5])[0]
+        else:
+            status = rng.choices(['Completed', 'Cancelled'], [94, 6])[0]
+        order_type = rng.choices(['At Stall', 'Pre-book'], [60, 40])[0]
+        order = {
+            'id': order_id,
+            'customer_name': rng.choice(FIRST_NAMES),
+            'customer_phone': f"9{rng.randrange(10 ** 9):09d}",
+            'order_type': order_type,
+            'estimated_arrival_time': (created_at + timedelta(minutes=rng.choice([15, 30, 45]))).strftime('%I:%M %p')
+                                      if order_type == 'Pre-book' else None,
+            'total_price': round(sum(prices[i] * q for i, q in lines.items()), 2),
+            'status': status,
+            'is_deleted': rng.random() < 0.02,
+            'idempotency_key': None,
+            'created_at': created_at,
+            'updated_at': created_at,
+        }
+        order_items = [{'order_id': order_id, 'menu_item_id': i, 'quantity': q, 'price_at_time': prices[i]}
+                       for i, q in lines.items()]
+        yield order, order_items
+
+
+def seed(args):
+    if os.path.exists(args.database):
+        if not args.force:
+            sys.exit(f"{args.database} already exists; pass --force to overwrite it.")
+        os.remove(args.database)
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.abspath(args.database)}"
+
+    # Imported here so DATABASE_URL is set before the config is read
+    from init_db import init_db
+    from app import create_app
+    from app.extensions import db
+    from app.models import Category, MenuItem, Order, OrderItem, PageView, Setting
+    from app.services import sales_rollup
+
+    init_db()
+    app = create_app()
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    with app.app_context():
+        db.session.add(Setting(key='shop_status', value='open'))
+        categories, items = _menu(rng, args.items)
+        db.session.execute(Category.__table__.insert(), categories)
+        db.session.execute(MenuItem.__table__.insert(), items)
+
+        orders, lines = [], []
+        for order, order_items in _orders(rng, items, _order_times(rng, args.orders, args.days)):
+            orders.append(order)
+            lines.extend(order_items)
+            if len(orders) >= BATCH:
+                db.session.execute(Order.__table__.insert(), orders)
+                db.session.execute(OrderItem.__table__.insert(), lines)
+                orders, lines = [], []
+        if orders:
+            db.session.execute(Order.__table__.insert(), orders)
+            db.session.execute(OrderItem.__table__.insert(), lines)
+
+        today = date.today()
+        db.session.execute(PageView.__table__.insert(), [
+            {'date': today - timedelta(days=d), 'count': rng.randint(150, 900)} for d in range(args.days)
+        ])
+        sales_rollup.rebuild()
+        db.session.commit()
+        n_lines = db.session.query(OrderItem).count()
+
+    print(f"Seeded {args.database}: {len(categories)} categories, {len(items)} items, "
+          f"{args.orders} orders, {n_lines} order items, {args.days} days of page views "
+          f"in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == '__main__':
+    seed(parse_args())
@@ -0,0 +1,90 @@
+"""Compare gunicorn worker setups on the public read path: throughput against memory.
+
+    python -m benchmarks.workers --database benchmarks/bench.db --db-latency-ms 5
+    python -m benchmarks.workers --configs sync:4 gthread:4x8 --db-latency-ms 20 --concurrency 64
+
+Each config is WORKER_CLASS:WORKERS or WORKER_CLASS:WORKERSxTHREADS. Every
+config gets a fresh gunicorn, driven over HTTP by benchmarks.driver with the
+same requests, while the server's memory (PSS of the master and workers) is
+sampled. The table shows requests per second next to peak memory, and
+requests per second per 100 MB, so setups using the same memory can be
+compared directly. Without --db-latency-ms the database answers from local
+disk, which hides exactly the waiting threads are meant to overlap.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks import driver
+
+DEFAULT_CONFIGS = ['sync:2', 'gthread:2x8', 'sync:8']
+READ_SCENARIOS = 'index,menu,order_success'
+
+
+def parse_config(value):
+    worker_class, _, shape = value.partition(':')
+    workers, _, threads = (shape or '1').partition('x')
+    try:
+        return worker_class, int(workers), int(threads or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{value!r} is not WORKER_CLASS:WORKERS[xTHREADS]')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', default='benchmarks/bench.db', help='SQLite file made by benchmarks.seed')
+    parser.add_argument('--configs', nargs='+', type=parse_config, default=[parse_config(c) for c in DEFAULT_CONFIGS])
+    parser.add_argument('--scenarios', default=READ_SCENARIOS)
+    parser.add_argument('--requests', type=int, default=1000, help='measured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--db-latency-ms', type=float, default=5, help='delay added before every SQL statement')
+    parser.add_argument('--output', help='also write the comparison as JSON')
+    return parser.parse_args(argv)
+
+
+def run_config(args, worker_class, workers, threads):
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        output = f.name
+    try:
+        driver.main([
+            '--database', args.database, '--gunicorn', '--scenarios', args.scenarios,
+            '--requests', str(args.requests), '--concurrency', str(args.concurrency),
+            '--workers', str(workers), '--worker-class', worker_class, '--threads', str(threads),
+            '--db-latency-ms', str(args.db_latency_ms), '--output', output,
+        ])
+        with open(output) as f:
+            return json.load(f)
+    finally:
+        os.unlink(output)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    for worker_class, workers, threads in args.configs:
+        label = f'{worker_class}:{workers}' + (f'x{threads}' if threads > 1 else '')
+        print(f'== {label}')
+        report = run_config(args, worker_class, workers, threads)
+        results.append({'config': label, 'worker_class': worker_class, 'workers': workers, 'threads': threads,
+                        'scenarios': report['scenarios']})
+
+    print()
+    print(f"{'config':<16}{'scenario':<16}{'rps':>9}{'p95 ms':>9}{'peak MB':>10}{'rps/100MB':>11}")
+    for result in results:
+        for name, s in result['scenarios'].items():
+            memory = s.get('memory_mb', {}).get('peak')
+            per_100mb = round(s['throughput_rps'] / memory * 100, 1) if memory else '-'
+            print(f"{result['config']:<16}{name:<16}{s['throughput_rps']:>9}{s['latency_ms']['p95']:>9}"
+                  f"{memory or '-':>10}{per_100mb:>11}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'db_latency_ms': args.db_latency_ms, 'concurrency': args.concurrency, 'results': results},
+                      f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,16 @@
+from app.services import assets
+
+def build_assets():
+    manifest = assets.build()
+    for name, filename in manifest['bundles'].items():
+        print(f"{name:<14} -> {filename}")
+    print(f"Wrote {len(manifest['bundles'])} bundles (gzip{', brotli' if assets.brotli else ''}) to {assets.DIST_DIR}.")
+    if assets.rjsmin is None:
+        print("rjsmin not installed (pip install -r requirements.txt); JavaScript bundles are not minified.")
+    if assets.brotli is None:
+        print("brotli not installed (pip install -r requirements.txt); no .br copies were written.")
+    if not manifest['tailwind']:
+        print("Tailwind CLI not found (run `npm install`); pages keep using the Tailwind CDN.")
+
+if __name__ == '__main__':
+    build_assets()
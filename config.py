@@ -12,11 +12,82 @@ class Config:
     
     SQLALCHEMY_DATABASE_URI = db_url
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection Pool (see app/services/db_pool.py)
+    # 'sqlite', 'serverless' (Supabase pooler on Vercel) or 'server' (gunicorn); detected from the URL if unset
+    DB_PROFILE = os.environ.get('DB_PROFILE')
+    # Override the profile's pool sizing; DB_POOL_SIZE=0 disables pooling entirely
+    DB_POOL_SIZE = int(os.environ['DB_POOL_SIZE']) if os.environ.get('DB_POOL_SIZE') else None
+    DB_MAX_OVERFLOW = int(os.environ['DB_MAX_OVERFLOW']) if os.environ.get('DB_MAX_OVERFLOW') else None
+    DB_POOL_TIMEOUT = float(os.environ['DB_POOL_TIMEOUT']) if os.environ.get('DB_POOL_TIMEOUT') else None
+    DB_POOL_RECYCLE = int(os.environ['DB_POOL_RECYCLE']) if os.environ.get('DB_POOL_RECYCLE') else None
     
     # Upload Settings
     UPLOAD_FOLDER = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'app', 'static', 'uploads')
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB max
+    # Where uploads are kept; any class with the LocalStorage interface can be plugged in
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'app.services.storage.LocalStorage')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
+    # Threads encoding resized image variants; 0 encodes inline (use on serverless)
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 0 if os.environ.get('VERCEL') else 2))
     
+    # Admin Settings
+    ORDERS_PER_PAGE = int(os.environ.get('ORDERS_PER_PAGE', 50))
+    # Live order feed: one DB poll per worker every N seconds, shared by all open admin screens
+    ORDER_FEED_POLL_INTERVAL = float(os.environ.get('ORDER_FEED_POLL_INTERVAL', 2))
+    # Keep under the gunicorn/proxy timeout; clients reconnect and resume from their cursor
+    ORDER_FEED_STREAM_SECONDS = float(os.environ.get('ORDER_FEED_STREAM_SECONDS', 25))
+    ORDER_FEED_LONG_POLL_SECONDS = float(os.environ.get('ORDER_FEED_LONG_POLL_SECONDS', 20))
+    # Kitchen view: each worker re-reads orders changed by other workers at most this often
+    KITCHEN_SYNC_INTERVAL = float(os.environ.get('KITCHEN_SYNC_INTERVAL', 3))
+    # How often kitchen screens poll; unchanged queues answer 304 without touching the database
+    KITCHEN_REFRESH_SECONDS = float(os.environ.get('KITCHEN_REFRESH_SECONDS', 5))
+    # Order intake limits (see app/services/order_intake.py); 0 disables a limit
+    # Order transactions at once per worker; keep it below the pool size so pages still get connections
+    ORDER_MAX_IN_FLIGHT = int(os.environ.get('ORDER_MAX_IN_FLIGHT', 4))
+    # Seconds a client is told to wait when every slot is busy
+    ORDER_RETRY_AFTER = float(os.environ.get('ORDER_RETRY_AFTER', 2))
+    # Stop taking orders while this many are Pending
+    ORDER_MAX_PENDING = int(os.environ.get('ORDER_MAX_PENDING', 0))
+    # Orders per phone number per window, per worker
+    ORDER_PHONE_LIMIT = int(os.environ.get('ORDER_PHONE_LIMIT', 5))
+    ORDER_PHONE_WINDOW = float(os.environ.get('ORDER_PHONE_WINDOW', 600))
+    # Completed/Cancelled orders older than this move to the archive tables (see archive_orders.py)
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 90))
+    # Scheduled archival via /admin/cron/archive; disabled unless CRON_SECRET is set
+    CRON_SECRET = os.environ.get('CRON_SECRET')
+    ARCHIVE_CRON_SECONDS = float(os.environ.get('ARCHIVE_CRON_SECONDS', 20))
+
     # Auth Settings
     REMEMBER_COOKIE_DURATION = timedelta(days=30)
+    # Logged-in admins are loaded from a per-worker cache; a password change made
+    # on another worker reaches this one within USER_CACHE_TTL seconds
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 30))
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 32))
+
+    # Cache Settings (seconds)
+    # How stale a worker's copy of the settings table may get before it is reloaded
+    SETTINGS_CACHE_TTL = float(os.environ.get('SETTINGS_CACHE_TTL', 30))
+    # Tighter bound used when accepting orders, so closing the shop takes effect quickly
+    SHOP_STATUS_MAX_AGE = float(os.environ.get('SHOP_STATUS_MAX_AGE', 5))
+    # Rendered public menu pages kept per worker (one per category filter and menu version)
+    MENU_CACHE_SIZE = int(os.environ.get('MENU_CACHE_SIZE', 64))
+    # Items per page on the public menu; further pages load as the customer scrolls
+    MENU_PAGE_SIZE = int(os.environ.get('MENU_PAGE_SIZE', 20))
+
+    # Cold starts (see app/services/cold_start.py)
+    # Compiled templates, reused across restarts; fill it at build time with `python startup_profile.py compile-templates`
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR', os.path.join(os.path.abspath(os.path.dirname(__file__)), '.jinja_cache'))
+
+    # Page View Counter
+    # Homepage hits are buffered per worker and written after this many hits or seconds.
+    # Serverless instances can be frozen or killed with hits still buffered, so there every hit is written
+    PAGE_VIEW_FLUSH_EVERY = int(os.environ.get('PAGE_VIEW_FLUSH_EVERY', 1 if os.environ.get('VERCEL') else 50))
+    PAGE_VIEW_FLUSH_INTERVAL = float(os.environ.get('PAGE_VIEW_FLUSH_INTERVAL', 10))
+
+    # Profiler (see app/services/profiler.py); per-endpoint timings on /admin/perf
+    PROFILER_ENABLED = os.environ.get('PROFILER', '').lower() in ('1', 'true', 'yes')
+    # Requests slower than this are logged with their SQL
+    PROFILER_SLOW_MS = float(os.environ.get('PROFILER_SLOW_MS', 500))
+    # Flag a request when one statement runs this many times (likely N+1)
+    PROFILER_N_PLUS_ONE = int(os.environ.get('PROFILER_N_PLUS_ONE', 5))
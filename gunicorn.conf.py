@@ -0,0 +1,25 @@
+import os
+
+# gunicorn settings for long-running servers (DB_PROFILE=server); gunicorn
+# reads this file from the working directory: `gunicorn run:app`.
+#
+# Public pages spend most of their time waiting on the database, and while a
+# thread waits on the socket it holds no GIL. gthread workers serve several
+# requests per process that way, so a slow pooler round trip no longer ties up
+# a whole worker, and concurrency comes from threads (a stack each) rather than
+# from processes (a full copy of the app each). `python -m benchmarks.workers`
+# compares the two at equal memory.
+#
+# Keep DB_POOL_SIZE plus the overflow at or above GUNICORN_THREADS, or threads
+# queue for a connection instead of for the database.
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+# Above ORDER_FEED_STREAM_SECONDS, so live order streams end on their own first
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = 5
+# Recycle workers now and then, staggered, to cap slow memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
@@ -3,12 +3,14 @@ import bcrypt
 from app import create_app
 from app.extensions import db
 from app.models import User, Setting
+from app.services import migrations, menu_cache
 
 def init_db():
     app = create_app()
     with app.app_context():
-        # Create tables
+        # Create tables, then record the schema version (and upgrade databases created by older releases)
         db.create_all()
+        migrations.upgrade(db.engine)
         
         # Add default admin if not exists
         if not User.query.filter_by(username='admin').first():
@@ -33,6 +35,10 @@ def init_db():
         for key, value in default_settings.items():
             if not Setting.query.filter_by(key=key).first():
                 db.session.add(Setting(key=key, value=value))
+
+        # Gives /api/menu a real Last-Modified from the start
+        if not Setting.query.filter_by(key='menu_version').first():
+            menu_cache.bump_version()
         
         db.session.commit()
         print("The Food Palace Database initialized successfully.")
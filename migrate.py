@@ -0,0 +1,49 @@
+import sys
+from app import create_app
+from app.extensions import db
+from app.services import migrations, query_check
+
+USAGE = """Usage: python migrate.py [command]
+
+  upgrade   Apply pending schema migrations (default)
+  status    List migrations and whether they have been applied
+  check     EXPLAIN the hot-path queries and report any that miss an index
+"""
+
+def upgrade():
+    applied = migrations.upgrade(db.engine)
+    for version, description in applied:
+        print(f"Applied {version:>3}  {description}")
+    print("Database is up to date." if applied else "Nothing to apply; database is up to date.")
+
+def status():
+    done = migrations.applied_versions(db.engine)
+    for version, description, _ in sorted(migrations.MIGRATIONS, key=lambda m: m[0]):
+        print(f"{'applied' if version in done else 'pending'}  {version:>3}  {description}")
+
+def check():
+    failed = 0
+    for name, plan, problems in query_check.check():
+        if problems:
+            failed += 1
+            print(f"MISS  {name}")
+            for line in problems:
+                print(f"        {line}")
+        else:
+            print(f"ok    {name}")
+    if failed:
+        print(f"{failed} quer{'y' if failed == 1 else 'ies'} not served by an index.")
+    return failed
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else 'upgrade'
+    commands = {'upgrade': upgrade, 'status': status, 'check': check}
+    if command not in commands:
+        print(USAGE)
+        return 2
+    app = create_app()
+    with app.app_context():
+        return 1 if commands[command]() else 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
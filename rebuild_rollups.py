@@ -0,0 +1,15 @@
+from app import create_app
+from app.extensions import db
+from app.services import sales_rollup, migrations
+
+def rebuild_rollups():
+    app = create_app()
+    with app.app_context():
+        # Make sure the rollup tables exist on databases created before they were added
+        migrations.upgrade(db.engine)
+        days, item_rows = sales_rollup.rebuild()
+        db.session.commit()
+        print(f"Rebuilt sales rollups: {days} days, {item_rows} item/day rows.")
+
+if __name__ == '__main__':
+    rebuild_rollups()
@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Cold-start profile: each run is a fresh interpreter that imports the app,
+# calls create_app() and serves the first / and /menu, the way a serverless
+# instance does. Reports the timings plus an import-time breakdown per
+# top-level package (from python -X importtime). With --max-ms it exits 1 when
+# the median cold start exceeds the budget, so CI can catch regressions.
+#
+#   python startup_profile.py                       # profile in serverless mode
+#   python startup_profile.py --no-template-cache   # compare with templates compiled on first render
+#   python startup_profile.py --max-ms 800 --json startup.json
+#   python startup_profile.py compile-templates     # fill TEMPLATE_CACHE_DIR before a deploy
+
+PAGES = (('index', '/'), ('menu', '/menu'))
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def measure():
+    # Runs in the child interpreter; prints one JSON line of timings
+    started = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+    timings = {'import_ms': (imported - started) * 1000, 'create_app_ms': (created - imported) * 1000}
+    client = app.test_client()
+    for name, path in PAGES:
+        t = time.perf_counter()
+        response = client.get(path)
+        timings[f'first_{name}_ms'] = (time.perf_counter() - t) * 1000
+        if response.status_code != 200:
+            raise SystemExit(f'{path} returned {response.status_code}')
+    timings['total_ms'] = (time.perf_counter() - started) * 1000
+    timings['modules'] = len(sys.modules)
+    print(json.dumps(timings))
+
+
+def _imports_by_package(stderr):
+    # Self time per top-level package, in microseconds
+    totals = {}
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            package = match.group(4).split('.')[0]
+            totals[package] = totals.get(package, 0) + int(match.group(1))
+    return totals
+
+
+def _run_once(env):
+    proc = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__), 'measure'],
+                          env=env, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'measure failed')
+    return json.loads(proc.stdout.strip().splitlines()[-1]), _imports_by_package(proc.stderr)
+
+
+def _prepare_database(env):
+    # A throwaway SQLite database with the schema and default settings, unless one is given
+    if env.get('DATABASE_URL'):
+        return
+    path = os.path.join(tempfile.mkdtemp(prefix='startup-'), 'startup.db')
+    env['DATABASE_URL'] = f'sqlite:///{path}'
+    subprocess.run([sys.executable, 'init_db.py'], env=env, check=True, capture_output=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def _compile_into(env):
+    subprocess.run([sys.executable, os.path.abspath(__file__), 'compile-templates'], env=env, check=True,
+                   capture_output=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile(args):
+    env = dict(os.environ)
+    env['TEMPLATE_CACHE_DIR'] = '' if args.no_template_cache else tempfile.mkdtemp(prefix='jinja-')
+    _prepare_database(env)
+    if env['TEMPLATE_CACHE_DIR']:
+        # As after a deploy: templates compiled at build time
+        _compile_into(env)
+
+    runs, imports = [], {}
+    for _ in range(args.runs):
+        timings, by_package = _run_once(env)
+        runs.append(timings)
+        for package, us in by_package.items():
+            imports.setdefault(package, []).append(us)
+
+    summary = {key: round(statistics.median(r[key] for r in runs), 1) for key in runs[0]}
+    packages = sorted(((p, statistics.median(v) / 1000) for p, v in imports.items()), key=lambda kv: -kv[1])
+    report = {
+        'mode': {'template_cache': not args.no_template_cache},
+        'runs': args.runs,
+        'median': summary,
+        'imports_ms': {p: round(ms, 1) for p, ms in packages[:args.top]},
+    }
+
+    print(f"Cold start, median of {args.runs} runs "
+          f"({'no ' if args.no_template_cache else ''}template cache):")
+    for key in ('import_ms', 'create_app_ms', *(f'first_{name}_ms' for name, _ in PAGES), 'total_ms'):
+        print(f"  {key[:-3]:<16}{summary[key]:>9.1f} ms")
+    print(f"  {'modules':<16}{summary['modules']:>9.0f}")
+    print("Import time by package (self time):")
+    for package, ms in packages[:args.top]:
+        print(f"  {package:<24}{ms:>8.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.max_ms is not None and summary['total_ms'] > args.max_ms:
+        print(f"Cold start {summary['total_ms']:.0f} ms is over the {args.max_ms:.0f} ms budget.")
+        return 1
+    return 0
+
+
+def compile_templates():
+    from app import create_app
+    from app.services import cold_start
+    app = create_app()
+    if not app.config['TEMPLATE_CACHE_DIR']:
+        print("TEMPLATE_CACHE_DIR is not set; nothing to do.")
+        return 1
+    count = cold_start.compile_templates(app)
+    print(f"Compiled {count} templates into {app.config['TEMPLATE_CACHE_DIR']}.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile cold starts of the app.')
+    parser.add_argument('command', nargs='?', default='profile', choices=('profile', 'compile-templates', 'measure'))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='packages to list in the import breakdown')
+    parser.add_argument('--no-template-cache', action='store_true', help='compile templates on first render')
+    parser.add_argument('--max-ms', type=float, help='exit 1 if the median total cold start is slower than this')
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+    if args.command == 'measure':
+        return measure()
+    if args.command == 'compile-templates':
+        return compile_templates()
+    return profile(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())